@@ -1,36 +1,100 @@
 from re import match
-from lib_final import SwitchFabric, Packet
+from lib_final import SwitchFabric, Packet, open_log
+from link import SimClock, Link, EgressPort
+from qos import FifoScheduler
+from multicast import IGMP_MAC, IgmpMessage, MulticastTable, is_multicast
+from lag import HashGroup
+from forwarding_plan import build_plan
 from queue import Queue
 
 class Host:
-    def __init__(self, mac, interface, vlan_id=1, ip_address="0.0.0.0"):
+    def __init__(self, mac, interface, vlan_id=1, ip_address="0.0.0.0", priority=0, pool=None):
         if not match(r'^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$', mac):
             raise ValueError("Invalid MAC address format")
         self.mac = mac
         self.interface = interface
         self.vlan_id = vlan_id
         self.ip_address = ip_address
+        self.priority = priority
+        self.groups = set()
         self.buffer = []
+        self.pool = pool
 
     def send_packet(self, dst_mac, payload, switch, dst_ip):
+        if self.pool is not None:
+            packet = self.pool.acquire(self.mac, dst_mac, self.ip_address, dst_ip, payload,
+                                       self.vlan_id, self.priority)
+            switch.handle_packet(packet, self.interface)
+            if packet.pooled:
+                packet.release()
+            return
         packet = Packet(
             src=self.mac,
             dst=dst_mac,
             src_ip=self.ip_address,
             dst_ip=dst_ip,
             payload=payload,
-            vlan_id=self.vlan_id
+            vlan_id=self.vlan_id,
+            priority=self.priority
         )
         switch.handle_packet(packet, self.interface)  
 
     def receive_packet(self, packet):
-        if (packet.dst == self.mac or packet.dst == "FF:FF:FF:FF:FF:FF") and packet.vlan_id == self.vlan_id:
+        # Group MACs are stored upper-case, as the switch's multicast table matches them
+        if (packet.dst == self.mac or packet.dst == "FF:FF:FF:FF:FF:FF"
+                or self.groups and packet.dst.upper() in self.groups) and packet.vlan_id == self.vlan_id:
             self.buffer.append(packet)
+            if packet.pooled:
+                packet.refs += 1
+
+    def consume(self, handler=None):
+        """
+        Empty the buffer, passing each frame to handler first. Pooled frames
+        are released, so handler must not keep them. Returns the frame count.
+        """
+        frames = self.buffer
+        self.buffer = []
+        for packet in frames:
+            if handler is not None:
+                handler(packet)
+            if packet.pooled:
+                packet.release()
+        return len(frames)
+
+    def join_group(self, group_mac, switch):
+        group_mac = group_mac.upper()
+        self.groups.add(group_mac)
+        self.send_packet(IGMP_MAC, IgmpMessage("join", group_mac), switch, "224.0.0.22")
+
+    def leave_group(self, group_mac, switch):
+        group_mac = group_mac.upper()
+        self.groups.discard(group_mac)
+        self.send_packet(IGMP_MAC, IgmpMessage("leave", group_mac), switch, "224.0.0.22")
 
 class Router:
-    def __init__(self):
+    def __init__(self, name="router", fabric=None):
+        """
+        fabric: SwitchFabric the router's interfaces sit on. Routed frames
+        to hosts on it leave through it, so links, egress queues and taps
+        see them; hosts elsewhere receive them directly. A router assigned
+        to a Switch is attached to the switch's fabric.
+        """
+        self.name = name
+        self.fabric = fabric
         self.interfaces = {}
         self.route_table = {}
+        self.ingress_acls = {}
+        self.egress_acls = {}
+        self.forwarded = 0
+        self.ttl_expired = 0
+
+    def set_acl(self, vlan_id, acl, direction="ingress"):
+        """Attach an acl.Acl to the router interface of a VLAN (None removes it)."""
+        acls = self.ingress_acls if direction == "ingress" else self.egress_acls
+        if acl is None:
+            acls.pop(vlan_id, None)
+        else:
+            acls[vlan_id] = acl
 
     def add_interface(self, vlan_id, interface):
         self.interfaces[vlan_id] = interface
@@ -38,34 +102,123 @@ class Router:
     def add_route(self, destination, next_hop=None, interface=None):
         self.route_table[destination] = (next_hop, interface)
 
+    def add_ecmp_route(self, destination, paths):
+        """
+        Install an equal-cost route; paths is a list of (next_hop, interface)
+        tuples and each flow is pinned to one of them by hash.
+        """
+        self.route_table[destination] = HashGroup(paths)
+
+    def connected_destinations(self):
+        """Destinations reached through a directly attached interface."""
+        return [destination for destination, route in self.route_table.items()
+                if not isinstance(route, HashGroup) and route[1] is not None]
+
+    def forward_to_router(self, packet, next_hop):
+        """Hand a packet to a neighbouring Router; each such hop costs one TTL."""
+        packet.ttl -= 1
+        if packet.ttl <= 0:
+            self.ttl_expired += 1
+            print(f"TTL expired for packet to {packet.dst_ip} at {self.name}")
+            return
+        self.forwarded += 1
+        next_hop.route_packet(packet, None)
+
     def route_packet(self, packet, src_vlan_id):
+        if self.ingress_acls:
+            acl = self.ingress_acls.get(src_vlan_id)
+            if acl is not None and not acl.permits(packet):
+                print(f"Packet denied by ingress ACL on VLAN {src_vlan_id}")
+                return
         destination = packet.dst_ip
         if destination in self.route_table:
-            next_hop, out_interface = self.route_table[destination]
+            route = self.route_table[destination]
+            if isinstance(route, HashGroup):
+                route = route.select(packet)
+                if route is None:
+                    print(f"All paths to {destination} are down")
+                    return
+            next_hop, out_interface = route
             if out_interface:
+                if self.egress_acls:
+                    acl = self.egress_acls.get(out_interface.vlan_id)
+                    if acl is not None and not acl.permits(packet):
+                        print(f"Packet denied by egress ACL on VLAN {out_interface.vlan_id}")
+                        return
                 packet.vlan_id = out_interface.vlan_id
-                out_interface.receive_packet(packet)
+                fabric = self.fabric
+                # Hosts on another fabric than the router's are handed the frame directly
+                if fabric is not None and fabric.interfaces.get(out_interface.interface) is out_interface:
+                    fabric.forward_to_interface(packet, out_interface.interface)
+                else:
+                    out_interface.receive_packet(packet)
+            elif isinstance(next_hop, Router):
+                self.forward_to_router(packet, next_hop)
             else:
                 print(f"Packet destination {destination} sent to next hop {next_hop}")
         else:
             print("No route to the destination")
 
 class SwitchFabric:
-    def __init__(self):
+    def __init__(self, log_file="fabric_log.txt"):
+        """
+        log_file: path, writable stream (in-memory log) or None to disable logging
+        """
         self.queue = Queue()
         self.physical_map = {}
         self.interfaces = {}
         self.vlan_map = {}
-        self.log_file = "fabric_log.txt"
-        with open(self.log_file, 'w') as f:
-            f.write("Switch Fabric Log Start\n")
+        self.clock = SimClock()
+        self.egress = {}
+        self.taps = []
+        self.log_file = log_file
+        self._write_log = open_log(log_file, "Switch Fabric Log Start\n")
         self.log_event("Switch Fabric initialized")
 
     def log_event(self, message, category="INFO"):
-        with open(self.log_file, 'a') as f:
-            f.write(f"[{category}] {message}\n")
+        self._write_log(f"[{category}] {message}\n")
+
+    def set_link(self, interface, bandwidth=1e9, delay=0.0, queue_depth=None, drop_policy=None, scheduler=None):
+        """
+        Attach a link model to an interface. Packets forwarded to it are queued
+        and delivered on self.clock instead of immediately; call run() to drain.
+        scheduler is a qos.Scheduler; by default a single FIFO class of
+        queue_depth packets (64) with drop_policy ("tail") is used. A
+        scheduler carries its own depth and drop policy, so they cannot be
+        given alongside it.
+        """
+        if scheduler is None:
+            scheduler = FifoScheduler(64 if queue_depth is None else queue_depth, drop_policy or "tail")
+        elif queue_depth is not None or drop_policy is not None:
+            raise ValueError("queue_depth and drop_policy are set on the scheduler, not on the link")
+        port = EgressPort(interface, Link(bandwidth, delay), self.clock, self._deliver, scheduler)
+        self.egress[interface] = port
+        self.log_event(f"Link on interface {interface}: {bandwidth} bps, {delay} s delay, "
+                       f"{type(scheduler).__name__} with {len(scheduler.classes)} class(es)", "LINK")
+        return port
+
+    def run(self, until=None):
+        self.clock.run(until)
+
+    def port_stats(self):
+        return {interface: port.stats() for interface, port in self.egress.items()}
+
+    def add_tap(self, tap):
+        """Register an observer (e.g. analytics.TrafficAnalytics); tap.observe(packet, interface) sees every forwarded frame."""
+        self.taps.append(tap)
+        return tap
 
     def forward_to_interface(self, packet, interface):
+        for tap in self.taps:
+            tap.observe(packet, interface)
+        port = self.egress.get(interface)
+        if port is not None:
+            if not port.enqueue(packet):
+                self.log_event(f"Egress queue full on interface {interface}, packet dropped", "DROP")
+            return
+        self._deliver(packet, interface)
+
+    def _deliver(self, packet, interface):
         host = self.interfaces.get(interface)
         if host:
             host.receive_packet(packet)
@@ -73,6 +226,10 @@ class SwitchFabric:
         else:
             self.log_event(f"Interface {interface} not found, unable to forward", "ERROR")
 
+# Switch attributes a compiled forwarding plan binds; replacing any of them rebuilds the plan
+PLAN_INPUTS = {"fabric", "router", "mac_table", "vlan_table", "interfaces", "multicast",
+               "lags", "ingress_acls", "egress_acls", "storm_control", "pool"}
+
 class Switch:
     def __init__(self, fabric, num_interfaces=8):
         self.num_interfaces = num_interfaces
@@ -81,8 +238,146 @@ class Switch:
         self.vlan_table = {}
         self.fabric = fabric
         self.router = Router()
+        self.multicast = MulticastTable()
+        self.lags = {}
+        self.ingress_acls = {}
+        self.egress_acls = {}
+        self.storm_control = {}
+        # Optional pool.PacketPool for the copies made by flood_packet
+        self.pool = None
+        self.compiled = False
+
+    def __setattr__(self, name, value):
+        if name == "router" and getattr(value, "fabric", False) is None:
+            value.fabric = self.fabric
+        object.__setattr__(self, name, value)
+        if name in PLAN_INPUTS and self.__dict__.get("compiled"):
+            self._reconfigured()
+
+    def compile(self):
+        """
+        Replace handle_packet with a forwarding plan generated for the current
+        configuration (see forwarding_plan). Replacing a table rebuilds the
+        plan; entries added to a table are seen without a rebuild, whether
+        through Switch methods or in place. A subclass that overrides
+        handle_packet cannot be compiled, since the plan would replace its
+        override; flood_packet and forward overrides are called by the plan.
+        The router is not compiled: the plan calls its route_packet.
+        """
+        if type(self).handle_packet is not Switch.handle_packet:
+            raise TypeError(f"{type(self).__name__} overrides handle_packet and cannot be compiled")
+        self.compiled = True
+        self._reconfigured()
+
+    def decompile(self):
+        self.compiled = False
+        self.__dict__.pop("handle_packet", None)
+        self.__dict__.pop("plan_source", None)
+
+    def _reconfigured(self):
+        if self.compiled:
+            self.handle_packet, self.plan_source = build_plan(self)
+
+    def add_lag(self, lag_id, ports):
+        """
+        Bundle physical ports into one logical port. Hosts or MAC table
+        entries use lag_id as their interface; each flow is sent on one member.
+        """
+        self.lags[lag_id] = HashGroup(ports)
+        self._map_lag_ports(lag_id, ports, True)
+        self.fabric.log_event(f"LAG {lag_id} created with ports {list(ports)}")
+
+    def remove_lag(self, lag_id):
+        lag = self.lags.pop(lag_id)
+        self._map_lag_ports(lag_id, lag.members, False)
+        self.fabric.log_event(f"LAG {lag_id} removed")
+
+    def set_port_state(self, port, up):
+        for lag_id, lag in self.lags.items():
+            if port in lag.members:
+                if up:
+                    lag.restore(port)
+                else:
+                    lag.fail(port)
+                self._map_lag_ports(lag_id, [port], up)
+                self.fabric.log_event(f"Port {port} of LAG {lag_id} {'up' if up else 'down'}")
+
+    def _map_lag_ports(self, lag_id, ports, up):
+        """
+        Point the fabric's member ports at the host attached as lag_id, or
+        unmap them. lag_id itself stays mapped: the host is addressed by it.
+        """
+        host = self.interfaces.get(lag_id)
+        if not host:
+            return
+        fabric_interfaces = self.fabric.interfaces
+        for port in ports:
+            if port == lag_id:
+                continue
+            if up:
+                fabric_interfaces[port] = host
+            elif fabric_interfaces.get(port) is host:
+                del fabric_interfaces[port]
+
+    def forward(self, packet, interface):
+        lag = self.lags.get(interface)
+        if lag is not None:
+            port = lag.select(packet)
+            if port is None:
+                self.fabric.log_event(f"All ports of LAG {interface} are down, packet dropped", "ERROR")
+                return
+            interface = port
+        if self.egress_acls:
+            acl = self.egress_acls.get(interface)
+            if acl is not None and not acl.permits(packet):
+                self.fabric.log_event(f"Packet denied by egress ACL on interface {interface}", "ACL")
+                return
+        self.fabric.forward_to_interface(packet, interface)
+
+    def set_acl(self, interface, acl, direction="ingress"):
+        """Attach an acl.Acl to a port (None removes it). Egress ACLs apply to physical ports."""
+        acls = self.ingress_acls if direction == "ingress" else self.egress_acls
+        if acl is None:
+            acls.pop(interface, None)
+        else:
+            acls[interface] = acl
+        self.fabric.log_event(f"{direction.capitalize()} ACL {'removed from' if acl is None else 'set on'} interface {interface}", "ACL")
+
+    def set_storm_control(self, interface, control):
+        """Attach a storm.StormControl to an ingress port (None removes it)."""
+        if control is None:
+            self.storm_control.pop(interface, None)
+        else:
+            self.storm_control[interface] = control
+        self.fabric.log_event(f"Storm control {'removed from' if control is None else 'set on'} interface {interface}", "STORM")
+
+    def storm_admit(self, packet, input_interface):
+        control = self.storm_control.get(input_interface)
+        if control is None:
+            return True
+        if packet.dst == "FF:FF:FF:FF:FF:FF":
+            kind = "broadcast"
+        elif is_multicast(packet.dst):
+            kind = "multicast"
+        elif packet.dst not in self.mac_table:
+            kind = "unknown_unicast"
+        else:
+            kind = None
+        if control.admit(kind, self.fabric.clock.now):
+            return True
+        if control.storm_detected:
+            self.fabric.log_event(f"Storm detected on interface {input_interface}, port shut down until {control.down_until:.3f}s", "STORM")
+        return False
 
     def handle_packet(self, packet, input_interface):
+        if self.storm_control and not self.storm_admit(packet, input_interface):
+            return
+        if self.ingress_acls:
+            acl = self.ingress_acls.get(input_interface)
+            if acl is not None and not acl.permits(packet):
+                self.fabric.log_event(f"Packet denied by ingress ACL on interface {input_interface}", "ACL")
+                return
+
         # Learn the source MAC address and corresponding interface and VLAN
         if packet.src not in self.mac_table:
             self.mac_table[packet.src] = input_interface
@@ -96,7 +391,7 @@ class Switch:
 
             if dst_vlan == packet.vlan_id:
                 # VLAN communication, forward directly
-                self.fabric.forward_to_interface(packet, dst_interface)
+                self.forward(packet, dst_interface)
                 print(f"packet = {packet}, interface = {dst_interface}")
                 self.fabric.log_event(f"VLAN forwarding: {packet.src} -> {packet.dst} in VLAN {packet.vlan_id}")
             else:
@@ -108,9 +403,33 @@ class Switch:
                 # Broadcast packet, flood within the same VLAN
                 self.fabric.log_event(f"Broadcast packet flooding in VLAN {packet.vlan_id}")
                 self.flood_packet(packet, input_interface)
+            elif is_multicast(packet.dst):
+                self.handle_multicast(packet, input_interface)
             else:
                 pass
 
+    def handle_multicast(self, packet, input_interface):
+        message = packet.payload
+        if isinstance(message, IgmpMessage):
+            # IGMP snooping: membership reports only update the group table
+            if message.kind == "join":
+                self.multicast.join(packet.vlan_id, message.group, input_interface, self.fabric.clock.now)
+            else:
+                self.multicast.leave(packet.vlan_id, message.group, input_interface)
+            self.fabric.log_event(f"IGMP {message.kind} for {message.group} on interface {input_interface} in VLAN {packet.vlan_id}")
+            return
+
+        members = self.multicast.members(packet.vlan_id, packet.dst.upper(), self.fabric.clock.now)
+        if not members:
+            self.fabric.log_event(f"No subscribers for group {packet.dst} in VLAN {packet.vlan_id}, packet dropped")
+            return
+        sent = 0
+        for interface in members:
+            if interface != input_interface:
+                self.forward(packet, interface)
+                sent += 1
+        self.fabric.log_event(f"Multicast {packet.dst} in VLAN {packet.vlan_id} sent to {sent} subscriber port(s)")
+
     def get_interface_by_mac(self, mac):
         return self.mac_table.get(mac)
 
@@ -129,16 +448,24 @@ class Switch:
     def flood_packet(self, packet, input_interface):
         for interface, host in self.interfaces.items():
             if host and host.vlan_id == packet.vlan_id and interface != input_interface:
-                flooded_packet = Packet(
-                    src=packet.src,
-                    dst=host.mac,
-                    src_ip=packet.src_ip,
-                    dst_ip=host.ip_address,
-                    payload=packet.payload,
-                    vlan_id=packet.vlan_id
-                )
-                self.fabric.forward_to_interface(flooded_packet, interface)
-                
+                if self.pool is not None:
+                    flooded_packet = self.pool.acquire(packet.src, host.mac, packet.src_ip, host.ip_address,
+                                                       packet.payload, packet.vlan_id, packet.priority, packet.size)
+                else:
+                    flooded_packet = Packet(
+                        src=packet.src,
+                        dst=host.mac,
+                        src_ip=packet.src_ip,
+                        dst_ip=host.ip_address,
+                        payload=packet.payload,
+                        vlan_id=packet.vlan_id,
+                        priority=packet.priority,
+                        size=packet.size
+                    )
+                self.forward(flooded_packet, interface)
+                if flooded_packet.pooled:
+                    flooded_packet.release()
+
                 self.fabric.log_event(f"Flooded packet within VLAN {packet.vlan_id} to interface {interface}")
 
 class FixedSwitchFabric(SwitchFabric):
@@ -147,4 +474,7 @@ class FixedSwitchFabric(SwitchFabric):
         switch.mac_table[host.mac] = host.interface
         switch.vlan_table[host.mac] = host.vlan_id
         self.interfaces[host.interface] = host
+        lag = switch.lags.get(host.interface)
+        if lag is not None:
+            switch._map_lag_ports(host.interface, lag.active, True)
         self.log_event(f"Host {host.mac} connected to switch interface {host.interface} in VLAN {host.vlan_id}")
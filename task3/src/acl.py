@@ -0,0 +1,237 @@
+"""
+Ordered permit/deny ACLs compiled into a tuple-space classifier.
+
+Rules with the same shape (which MACs are exact, the two IP prefix lengths,
+whether VLAN and payload class are exact) share one hash table keyed by the
+masked packet fields. A lookup probes one table per shape, in order of the
+first rule each shape holds, and stops once no remaining shape can hold an
+earlier rule. VLAN and priority ranges are checked on the few candidates a
+probe returns. Results are also memoized per flow until the ACL changes.
+"""
+from ipaddress import IPv4Network
+
+ACTIONS = ("permit", "deny")
+FLOW_CACHE_SIZE = 65536
+IP_CACHE_SIZE = 65536
+
+_ip_cache = {}
+
+
+def ip_to_int(ip):
+    value = _ip_cache.get(ip)
+    if value is None:
+        try:
+            a, b, c, d = (int(octet) for octet in ip.split("."))
+            value = (a << 24) | (b << 16) | (c << 8) | d
+        except (AttributeError, ValueError):
+            value = -1
+        # Shared by every ACL and packet arena: start over rather than grow without bound
+        if len(_ip_cache) >= IP_CACHE_SIZE:
+            _ip_cache.clear()
+        _ip_cache[ip] = value
+    return value
+
+
+def _prefix(cidr):
+    if cidr is None:
+        return 0, 0
+    network = IPv4Network(cidr, strict=False)
+    return network.prefixlen, int(network.network_address)
+
+
+def _range(value):
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value, value
+    low, high = value
+    if low > high:
+        raise ValueError(f"Empty range: {value}")
+    return low, high
+
+
+def _mask(prefixlen):
+    return (0xFFFFFFFF << (32 - prefixlen)) & 0xFFFFFFFF
+
+
+class AclRule:
+    """
+    One ACL entry. Omitted fields match anything.
+    - src_mac, dst_mac: exact MAC address
+    - src_ip, dst_ip: CIDR such as "192.168.10.0/24" (a bare address is a /32)
+    - vlan, priority: single value or inclusive (low, high) range
+    - payload_class: type name of the payload, e.g. "str" or "IgmpMessage"
+    """
+    def __init__(self, action, src_mac=None, dst_mac=None, src_ip=None, dst_ip=None,
+                 vlan=None, priority=None, payload_class=None):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown ACL action: {action}")
+        self.action = action
+        self.permit = action == "permit"
+        self.src_mac = src_mac.upper() if src_mac else None
+        self.dst_mac = dst_mac.upper() if dst_mac else None
+        self.src_ip = src_ip
+        self.dst_ip = dst_ip
+        self.src_plen, self.src_net = _prefix(src_ip)
+        self.dst_plen, self.dst_net = _prefix(dst_ip)
+        self.vlan = _range(vlan)
+        self.priority = _range(priority)
+        self.payload_class = payload_class
+        self.hits = 0
+
+    def shape(self):
+        exact_vlan = self.vlan is not None and self.vlan[0] == self.vlan[1]
+        return (self.src_mac is not None, self.dst_mac is not None, self.src_plen, self.dst_plen,
+                exact_vlan, self.payload_class is not None)
+
+    def key(self):
+        exact_vlan = self.vlan is not None and self.vlan[0] == self.vlan[1]
+        return (self.src_mac, self.dst_mac, self.src_net, self.dst_net,
+                self.vlan[0] if exact_vlan else None, self.payload_class)
+
+    def residual(self, packet):
+        vlan = self.vlan
+        if vlan is not None and vlan[0] != vlan[1] and not vlan[0] <= packet.vlan_id <= vlan[1]:
+            return False
+        priority = self.priority
+        if priority is not None and not priority[0] <= packet.priority <= priority[1]:
+            return False
+        return True
+
+    def matches(self, packet):
+        """Reference (uncompiled) match used by the linear scan."""
+        if self.src_mac is not None and packet.src.upper() != self.src_mac:
+            return False
+        if self.dst_mac is not None and packet.dst.upper() != self.dst_mac:
+            return False
+        if self.src_plen:
+            ip = ip_to_int(packet.src_ip)
+            if ip < 0 or ip & _mask(self.src_plen) != self.src_net:
+                return False
+        if self.dst_plen:
+            ip = ip_to_int(packet.dst_ip)
+            if ip < 0 or ip & _mask(self.dst_plen) != self.dst_net:
+                return False
+        if self.vlan is not None and not self.vlan[0] <= packet.vlan_id <= self.vlan[1]:
+            return False
+        if self.payload_class is not None and type(packet.payload).__name__ != self.payload_class:
+            return False
+        return self.residual(packet)
+
+    def __str__(self):
+        fields = [f"{name}={value}" for name, value in (
+            ("src_mac", self.src_mac), ("dst_mac", self.dst_mac), ("src_ip", self.src_ip),
+            ("dst_ip", self.dst_ip), ("vlan", self.vlan), ("priority", self.priority),
+            ("payload_class", self.payload_class)) if value is not None]
+        return f"{self.action} {' '.join(fields) or 'any'}"
+
+
+class _Shape:
+    def __init__(self, shape):
+        self.exact_src_mac, self.exact_dst_mac, self.src_plen, self.dst_plen, self.exact_vlan, self.exact_class = shape
+        self.src_mask = _mask(self.src_plen)
+        self.dst_mask = _mask(self.dst_plen)
+        self.table = {}
+        self.first = None
+
+
+class Acl:
+    """
+    Ordered list of AclRule; the first matching rule decides. Packets that
+    match no rule get the default action. Any change marks the ACL dirty and
+    it is recompiled on the next lookup.
+    """
+    def __init__(self, rules=(), default="permit"):
+        if default not in ACTIONS:
+            raise ValueError(f"Unknown ACL action: {default}")
+        self.rules = list(rules)
+        self.default = default
+        self.default_hits = 0
+        self.compilations = 0
+        self._shapes = None
+        self._flows = {}
+
+    def add(self, rule):
+        self.rules.append(rule)
+        self._invalidate()
+
+    def insert(self, index, rule):
+        self.rules.insert(index, rule)
+        self._invalidate()
+
+    def remove(self, rule):
+        self.rules.remove(rule)
+        self._invalidate()
+
+    def _invalidate(self):
+        self._shapes = None
+        self._flows = {}
+
+    def compile(self):
+        shapes = {}
+        for index, rule in enumerate(self.rules):
+            shape = shapes.get(rule.shape())
+            if shape is None:
+                shape = shapes[rule.shape()] = _Shape(rule.shape())
+                shape.first = index
+            shape.table.setdefault(rule.key(), []).append((index, rule))
+        self._shapes = sorted(shapes.values(), key=lambda s: s.first)
+        self.compilations += 1
+
+    def lookup(self, packet):
+        """Return the first matching rule, or None for the default action."""
+        flow = (packet.src, packet.dst, packet.src_ip, packet.dst_ip, packet.vlan_id,
+                packet.priority, type(packet.payload).__name__)
+        cached = self._flows.get(flow, False)
+        if cached is not False:
+            return cached
+        if self._shapes is None:
+            self.compile()
+
+        src_mac = packet.src.upper()
+        dst_mac = packet.dst.upper()
+        src_ip = ip_to_int(packet.src_ip)
+        dst_ip = ip_to_int(packet.dst_ip)
+        payload_class = flow[6]
+        best_index = len(self.rules)
+        best = None
+        for shape in self._shapes:
+            if shape.first >= best_index:
+                break
+            key = (src_mac if shape.exact_src_mac else None,
+                   dst_mac if shape.exact_dst_mac else None,
+                   ((src_ip & shape.src_mask) if src_ip >= 0 else None) if shape.src_plen else 0,
+                   ((dst_ip & shape.dst_mask) if dst_ip >= 0 else None) if shape.dst_plen else 0,
+                   packet.vlan_id if shape.exact_vlan else None,
+                   payload_class if shape.exact_class else None)
+            candidates = shape.table.get(key)
+            if not candidates:
+                continue
+            for index, rule in candidates:
+                if index >= best_index:
+                    break
+                if rule.residual(packet):
+                    best_index, best = index, rule
+                    break
+
+        if len(self._flows) >= FLOW_CACHE_SIZE:
+            self._flows.clear()
+        self._flows[flow] = best
+        return best
+
+    def permits(self, packet):
+        rule = self.lookup(packet)
+        if rule is None:
+            self.default_hits += 1
+            return self.default == "permit"
+        rule.hits += 1
+        return rule.permit
+
+    def lookup_linear(self, packet):
+        for rule in self.rules:
+            if rule.matches(packet):
+                return rule
+        return None
+
+    def counters(self):
+        return [(str(rule), rule.hits) for rule in self.rules] + [(f"default {self.default}", self.default_hits)]
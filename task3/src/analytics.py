@@ -0,0 +1,234 @@
+"""
+Streaming traffic analytics for a SwitchFabric.
+
+TrafficAnalytics is a fabric tap: every frame the fabric forwards updates
+per-VLAN volumes and either exact per-(src, dst) counters or, for large
+host counts, a Count-Min sketch with a top-k talker list. Per-frame work is
+a few dict updates; the src x dst matrix is only built when a snapshot is
+asked for it. NumPy is used for matrices when installed, otherwise plain
+lists are returned; .npy files are written either way.
+"""
+import csv
+import struct
+from hashlib import blake2b
+from heapq import nsmallest
+from random import Random
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch: estimates never undercount and overcount by at most
+    ~e/width of the total. Each row takes its own 32 bits of one keyed
+    blake2b digest of repr(key), so rows are independent of each other and,
+    unlike hash(), the same across processes.
+    """
+    def __init__(self, width=2048, depth=4, seed=38):
+        if not 1 <= depth <= 16:
+            raise ValueError("Sketch depth must be between 1 and 16")
+        self.width = width
+        self.depth = depth
+        self.key = Random(seed).getrandbits(128).to_bytes(16, "little")
+        self._unpack = struct.Struct(f"<{depth}I").unpack
+        self.rows = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    def _cells(self, key):
+        digest = blake2b(repr(key).encode(), digest_size=4 * self.depth, key=self.key).digest()
+        width = self.width
+        return [h % width for h in self._unpack(digest)]
+
+    def add(self, key, count=1):
+        self.total += count
+        estimate = None
+        for row, cell in zip(self.rows, self._cells(key)):
+            row[cell] += count
+            if estimate is None or row[cell] < estimate:
+                estimate = row[cell]
+        return estimate
+
+    def estimate(self, key):
+        return min(row[cell] for row, cell in zip(self.rows, self._cells(key)))
+
+
+class TopK:
+    """Heavy hitters over a CountMinSketch: keeps the k keys with the largest estimates."""
+    def __init__(self, k=10, sketch=None):
+        self.k = k
+        self.sketch = sketch if sketch is not None else CountMinSketch()
+        self.entries = {}
+        self._floor = None
+
+    def add(self, key, count=1):
+        estimate = self.sketch.add(key, count)
+        entries = self.entries
+        if key in entries or len(entries) < self.k:
+            if key not in entries or key == self._floor:
+                self._floor = None
+            entries[key] = estimate
+            return
+        if self._floor is None:
+            self._floor = min(entries, key=entries.get)
+        if estimate > entries[self._floor]:
+            del entries[self._floor]
+            entries[key] = estimate
+            self._floor = None
+
+    def items(self):
+        return sorted(self.entries.items(), key=lambda item: (-item[1], item[0]))
+
+
+class TrafficSnapshot:
+    """Counters of one window. hosts fixes the row/column order of matrix()."""
+    def __init__(self, start, end, frames, bytes_, vlan_frames, vlan_bytes, pair_frames, pair_bytes, talkers):
+        self.start = start
+        self.end = end
+        self.frames = frames
+        self.bytes = bytes_
+        self.vlan_frames = vlan_frames
+        self.vlan_bytes = vlan_bytes
+        self.pair_frames = pair_frames
+        self.pair_bytes = pair_bytes
+        self.talkers = talkers
+        hosts = set()
+        for src, dst in (pair_bytes or ()):
+            hosts.add(src)
+            hosts.add(dst)
+        self.hosts = sorted(hosts)
+
+    def top_talkers(self, n=10):
+        return self.talkers[:n]
+
+    def matrix(self, metric="bytes"):
+        """src x dst matrix in self.hosts order; a NumPy array if NumPy is installed."""
+        rows = self._rows(metric)
+        try:
+            import numpy
+        except ImportError:
+            return rows
+        return numpy.array(rows, dtype=numpy.int64).reshape(len(rows), len(rows))
+
+    def _rows(self, metric):
+        if self.pair_bytes is None:
+            raise ValueError("Pair counters are not kept in sketch mode")
+        pairs = self.pair_bytes if metric == "bytes" else self.pair_frames
+        index = {mac: i for i, mac in enumerate(self.hosts)}
+        rows = [[0] * len(self.hosts) for _ in self.hosts]
+        for (src, dst), value in pairs.items():
+            rows[index[src]][index[dst]] = value
+        return rows
+
+    def save_npy(self, path, metric="bytes"):
+        rows = self._rows(metric)
+        try:
+            import numpy
+        except ImportError:
+            _write_npy(path, rows)
+            return
+        numpy.save(path, numpy.array(rows, dtype=numpy.int64).reshape(len(rows), len(rows)))
+
+    def save_csv(self, path, metric="bytes"):
+        rows = self._rows(metric)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["src\\dst"] + self.hosts)
+            for mac, row in zip(self.hosts, rows):
+                writer.writerow([mac] + row)
+
+
+def _write_npy(path, rows):
+    # NPY format 1.0: magic, header length, dict header padded to 64 bytes, C-order little-endian int64
+    n = len(rows)
+    header = f"{{'descr': '<i8', 'fortran_order': False, 'shape': ({n}, {n}), }}"
+    header += " " * (63 - (10 + len(header)) % 64) + "\n"
+    with open(path, "wb") as f:
+        f.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+        for row in rows:
+            f.write(struct.pack(f"<{n}q", *row))
+
+
+class TrafficAnalytics:
+    """
+    Fabric tap collecting traffic counters, in windows of `window` seconds of
+    simulated time (None keeps one window until roll() is called). Only the
+    last `keep` closed windows are retained.
+
+    With sketch=False every (src, dst) pair is counted exactly. With
+    sketch=True memory stays fixed: talkers come from a TopK over a
+    CountMinSketch and pair volumes from estimate_pair().
+    """
+    def __init__(self, clock=None, window=None, keep=16, sketch=False, top_k=10, width=2048, depth=4):
+        self.clock = clock
+        self.window = window
+        self.keep = keep
+        self.sketch = sketch
+        self.top_k = top_k
+        self.width = width
+        self.depth = depth
+        self.windows = []
+        self._reset(clock.now if clock is not None else 0.0)
+
+    def _reset(self, start):
+        self.start = start
+        self.window_end = start + self.window if self.window else float("inf")
+        self.frames = 0
+        self.bytes = 0
+        self.vlan_frames = {}
+        self.vlan_bytes = {}
+        if self.sketch:
+            self.pair_frames = self.pair_bytes = None
+            self.talkers = TopK(self.top_k, CountMinSketch(self.width, self.depth))
+            self.pairs = CountMinSketch(self.width, self.depth, seed=39)
+        else:
+            self.pair_frames = {}
+            self.pair_bytes = {}
+
+    def observe(self, packet, interface):
+        if self.clock is not None and self.clock.now >= self.window_end:
+            self.roll()
+        size = packet.size
+        self.frames += 1
+        self.bytes += size
+        vlan = packet.vlan_id
+        self.vlan_frames[vlan] = self.vlan_frames.get(vlan, 0) + 1
+        self.vlan_bytes[vlan] = self.vlan_bytes.get(vlan, 0) + size
+        if self.pair_bytes is not None:
+            key = (packet.src, packet.dst)
+            self.pair_frames[key] = self.pair_frames.get(key, 0) + 1
+            self.pair_bytes[key] = self.pair_bytes.get(key, 0) + size
+        else:
+            self.talkers.add(packet.src, size)
+            self.pairs.add((packet.src, packet.dst), size)
+
+    def estimate_pair(self, src, dst):
+        if self.pair_bytes is not None:
+            return self.pair_bytes.get((src, dst), 0)
+        return self.pairs.estimate((src, dst))
+
+    def snapshot(self):
+        """Counters of the current (open) window."""
+        end = self.clock.now if self.clock is not None else None
+        if self.pair_bytes is not None:
+            volumes = {}
+            for (src, _), value in self.pair_bytes.items():
+                volumes[src] = volumes.get(src, 0) + value
+            talkers = nsmallest(self.top_k, volumes.items(), key=lambda item: (-item[1], item[0]))
+            pair_frames, pair_bytes = dict(self.pair_frames), dict(self.pair_bytes)
+        else:
+            talkers = self.talkers.items()
+            pair_frames = pair_bytes = None
+        return TrafficSnapshot(self.start, end, self.frames, self.bytes, dict(self.vlan_frames),
+                               dict(self.vlan_bytes), pair_frames, pair_bytes, talkers)
+
+    def roll(self):
+        """Close the current window and start a new one; returns the closed snapshot."""
+        snapshot = self.snapshot()
+        if self.window:
+            snapshot.end = self.window_end
+        self.windows.append(snapshot)
+        del self.windows[:-self.keep]
+        now = self.clock.now if self.clock is not None else 0.0
+        if self.window:
+            # Skip empty windows in one step
+            now = self.window_end + (now - self.window_end) // self.window * self.window
+        self._reset(now)
+        return snapshot
@@ -0,0 +1,58 @@
+BROADCAST = "FF:FF:FF:FF:FF:FF"
+
+
+class BridgePort:
+    """Attachment of a LearningBridge to one Bus segment; receives every frame on it."""
+    def __init__(self, bridge, index, segment):
+        self.bridge = bridge
+        self.index = index
+        self.segment = segment
+        # Locally administered address so no host frame is mistaken for the port's own
+        self.mac = f"02:00:00:00:{bridge.bridge_id:02X}:{index:02X}"
+
+    def receive_packet(self, packet):
+        self.bridge.handle_packet(packet, self.index)
+
+
+class LearningBridge:
+    """
+    Transparent bridge joining several Bus segments. It learns the segment
+    of every source MAC, filters frames whose destination is on the segment
+    they came from, forwards known unicast to one segment and floods
+    broadcast and unknown unicast to all other segments. Segments must form
+    a tree; there is no spanning tree protocol.
+    """
+    def __init__(self, segments=(), bridge_id=1):
+        self.bridge_id = bridge_id
+        self.ports = []
+        self.mac_table = {}
+        self.forwarded = 0
+        self.filtered = 0
+        self.flooded = 0
+        for segment in segments:
+            self.add_segment(segment)
+
+    def add_segment(self, segment):
+        port = BridgePort(self, len(self.ports), segment)
+        self.ports.append(port)
+        segment.connect_host(port)
+        return port
+
+    def handle_packet(self, packet, in_port):
+        self.mac_table[packet.src] = in_port
+        out_port = self.mac_table.get(packet.dst) if packet.dst != BROADCAST else None
+        if out_port == in_port:
+            self.filtered += 1
+            return
+        if out_port is not None:
+            self.forwarded += 1
+            port = self.ports[out_port]
+            port.segment.broadcast(packet, sender=port)
+            return
+        self.flooded += 1
+        for port in self.ports:
+            if port.index != in_port:
+                port.segment.broadcast(packet, sender=port)
+
+    def segment_of(self, mac):
+        return self.mac_table.get(mac)
@@ -0,0 +1,159 @@
+"""
+Compiled forwarding plans for Switch.
+
+build_plan(switch) generates the source of a handle_packet function
+specialized to the switch's current configuration and execs it in a
+namespace holding the tables and callbacks it needs, so no lookup goes
+through the switch, fabric or router objects. A feature that is not
+configured (storm control, ACLs, LAGs) costs one test of its empty table,
+frames go straight to the receiving host when no LAG, egress ACL, link or
+tap sits in between, and log messages are not even formatted when the
+fabric logs nowhere.
+
+Plan sources are registered with linecache under the plan's pseudo file
+name, so tracebacks and tools such as memprof can show their lines.
+
+The plan only binds objects, so entries added to the MAC, VLAN, multicast,
+LAG, ACL or storm control tables are seen immediately, however they are
+added, as are links and taps added to the fabric. Replacing one of those
+objects, the packet pool or the fabric needs a new plan; Switch does that
+itself when it is compiled (see Switch.compile).
+
+Routers are not compiled. The plan calls router.route_packet for
+inter-VLAN frames, and RoutedNetwork rewrites route tables in place, so a
+router plan would save little beyond the attribute lookups of a path that
+carries a small share of the traffic.
+"""
+import linecache
+import weakref
+
+from lib_final import Packet
+from multicast import is_multicast
+
+BROADCAST = "FF:FF:FF:FF:FF:FF"
+# Code objects of plans are compiled under this pseudo file name
+PLAN_FILENAME_PREFIX = "<forwarding plan"
+
+
+def _emit(lines, indent, logging, message, category=None):
+    if logging:
+        args = f'f"{message}"' + (f', "{category}"' if category else "")
+        lines.append(" " * indent + f"log_event({args})")
+
+
+def _emit_forward(lines, indent, logging, direct, inline_deliver, packet, interface):
+    pad = " " * indent
+    if not direct:
+        lines.append(f"{pad}forward({packet}, {interface})")
+        return
+    if not inline_deliver:
+        lines += [f"{pad}if lags or egress_acls:",
+                  f"{pad}    forward({packet}, {interface})",
+                  f"{pad}else:",
+                  f"{pad}    forward_to_interface({packet}, {interface})"]
+        return
+    # LAGs, egress ACLs, links and taps can be added at any time, so test for them on every frame
+    lines += [f"{pad}if lags or egress_acls or egress or taps:",
+              f"{pad}    forward({packet}, {interface})",
+              f"{pad}else:",
+              f"{pad}    receiver = fabric_interfaces.get({interface})",
+              f"{pad}    if receiver:",
+              f"{pad}        receiver.receive_packet({packet})"]
+    _emit(lines, indent + 8, logging, "Packet forwarded to interface {" + interface + "}", "FORWARD")
+    if logging:
+        lines += [f"{pad}    else:"]
+        _emit(lines, indent + 8, logging, "Interface {" + interface + "} not found, unable to forward", "ERROR")
+
+
+def plan_source(switch):
+    """Source text of the plan for the switch's current configuration."""
+    from Sim_LAN1225 import Switch, SwitchFabric
+
+    logging = switch.fabric.log_file is not None
+    kind = type(switch)
+    fabric_kind = type(switch.fabric)
+    inline_flood = kind.flood_packet is Switch.flood_packet
+    direct = kind.forward is Switch.forward
+    inline_deliver = (fabric_kind.forward_to_interface is SwitchFabric.forward_to_interface
+                      and fabric_kind._deliver is SwitchFabric._deliver)
+
+    # Storm control and ACL entries may be added in place, so the tables are tested on every frame
+    lines = ["def handle_packet(packet, input_interface):",
+             "    if storm_control and not storm_admit(packet, input_interface):",
+             "        return",
+             "    if ingress_acls:",
+             "        acl = ingress_acls.get(input_interface)",
+             "        if acl is not None and not acl.permits(packet):"]
+    _emit(lines, 12, logging, "Packet denied by ingress ACL on interface {input_interface}", "ACL")
+    lines += ["            return"]
+    lines += ["    src = packet.src",
+              "    if src not in mac_table:",
+              "        mac_table[src] = input_interface",
+              "        vlan_table[src] = packet.vlan_id"]
+    _emit(lines, 8, logging, "Learned MAC {src} on interface {input_interface} and VLAN {packet.vlan_id}")
+    lines += ["    dst = packet.dst",
+              "    if dst in mac_table:",
+              "        dst_interface = mac_table[dst]",
+              "        dst_vlan = vlan_table.get(dst)",
+              "        if dst_vlan == packet.vlan_id:"]
+    _emit_forward(lines, 12, logging, direct, inline_deliver, "packet", "dst_interface")
+    lines += ['            print(f"packet = {packet}, interface = {dst_interface}")']
+    _emit(lines, 12, logging, "VLAN forwarding: {src} -> {dst} in VLAN {packet.vlan_id}")
+    lines += ["        else:"]
+    _emit(lines, 12, logging, "Inter-VLAN forwarding: {src} (VLAN {packet.vlan_id}) -> {dst} (VLAN {dst_vlan})")
+    lines += ["            route_packet(packet, packet.vlan_id)",
+              "    elif dst == BROADCAST:"]
+    _emit(lines, 8, logging, "Broadcast packet flooding in VLAN {packet.vlan_id}")
+    lines += ["        flood_packet(packet, input_interface)",
+              "    elif is_multicast(dst):",
+              "        handle_multicast(packet, input_interface)"]
+
+    if inline_flood:
+        lines += ["",
+                  "def flood_packet(packet, input_interface):",
+                  "    vlan_id = packet.vlan_id",
+                  "    for interface, host in interfaces.items():",
+                  "        if host and host.vlan_id == vlan_id and interface != input_interface:",
+                  f"            flooded_packet = {'Packet' if switch.pool is None else 'acquire'}(packet.src, host.mac, "
+                  "packet.src_ip, host.ip_address, packet.payload, vlan_id, packet.priority, packet.size)"]
+        _emit_forward(lines, 12, logging, direct, inline_deliver, "flooded_packet", "interface")
+        if switch.pool is not None:
+            lines += ["            if flooded_packet.pooled:",
+                      "                flooded_packet.release()"]
+        _emit(lines, 12, logging, "Flooded packet within VLAN {vlan_id} to interface {interface}")
+    return "\n".join(lines) + "\n"
+
+
+def build_plan(switch):
+    """Return (handle_packet, source) specialized to the switch's current configuration."""
+    source = plan_source(switch)
+    namespace = {
+        "BROADCAST": BROADCAST,
+        "Packet": Packet,
+        "acquire": switch.pool.acquire if switch.pool is not None else None,
+        "is_multicast": is_multicast,
+        "mac_table": switch.mac_table,
+        "vlan_table": switch.vlan_table,
+        "interfaces": switch.interfaces,
+        "ingress_acls": switch.ingress_acls,
+        "egress_acls": switch.egress_acls,
+        "storm_control": switch.storm_control,
+        "lags": switch.lags,
+        "storm_admit": switch.storm_admit,
+        "forward": switch.forward,
+        "forward_to_interface": switch.fabric.forward_to_interface,
+        "route_packet": switch.router.route_packet,
+        "flood_packet": switch.flood_packet,
+        "handle_multicast": switch.handle_multicast,
+        "log_event": switch.fabric.log_event,
+        "egress": switch.fabric.egress,
+        "taps": switch.fabric.taps,
+        "fabric_interfaces": switch.fabric.interfaces,
+    }
+    filename = f"{PLAN_FILENAME_PREFIX} for switch {id(switch):x}>"
+    if filename not in linecache.cache:
+        weakref.finalize(switch, linecache.cache.pop, filename, None)
+    # An mtime of None keeps linecache.checkcache() from discarding the entry
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace["handle_packet"], source
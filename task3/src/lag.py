@@ -0,0 +1,72 @@
+from zlib import crc32
+
+DEFAULT_BUCKETS = 256
+
+
+def flow_hash(packet):
+    """
+    Deterministic per-flow hash over the MAC and IP fields. crc32 is used
+    instead of hash() because str hashing is randomized per process.
+    """
+    key = f"{packet.src}|{packet.dst}|{packet.src_ip}|{packet.dst_ip}"
+    return crc32(key.encode())
+
+
+class HashGroup:
+    """
+    A set of equivalent members (LAG ports or ECMP next hops) selected per
+    flow through a fixed bucket table. When a member fails only its own
+    buckets are handed to the survivors, and a restored member takes back
+    buckets from the most loaded members, so other flows keep their path.
+    """
+    def __init__(self, members, buckets=DEFAULT_BUCKETS):
+        if not members:
+            raise ValueError("A hash group needs at least one member")
+        self.members = list(members)
+        self.active = list(members)
+        self.table = [self.active[i % len(self.active)] for i in range(buckets)]
+        self.counts = {member: 0 for member in self.members}
+
+    def select(self, packet):
+        member = self.table[flow_hash(packet) % len(self.table)]
+        if member is not None:
+            self.counts[member] += 1
+        return member
+
+    def fail(self, member):
+        if member not in self.active:
+            return
+        self.active.remove(member)
+        survivors = self.active
+        orphans = [i for i, m in enumerate(self.table) if m == member]
+        if not survivors:
+            for i in orphans:
+                self.table[i] = None
+            return
+        load = self._bucket_load()
+        for i in orphans:
+            target = min(survivors, key=load.__getitem__)
+            self.table[i] = target
+            load[target] += 1
+
+    def restore(self, member):
+        if member not in self.members or member in self.active:
+            return
+        self.active.append(member)
+        share = len(self.table) // len(self.active)
+        load = self._bucket_load()
+        load.pop(None, None)
+        for i, current in enumerate(self.table):
+            if load.get(member, 0) >= share:
+                break
+            if current is None or load[current] > share:
+                if current is not None:
+                    load[current] -= 1
+                self.table[i] = member
+                load[member] = load.get(member, 0) + 1
+
+    def _bucket_load(self):
+        load = {member: 0 for member in self.active}
+        for member in self.table:
+            load[member] = load.get(member, 0) + 1
+        return load
@@ -0,0 +1,26 @@
+"""
+Small LANs shared by the tests: one switch on a FixedSwitchFabric with a
+host on each of the first n_hosts interfaces.
+"""
+from Sim_LAN1225 import Host, Switch, FixedSwitchFabric
+
+
+def build_lan(n_hosts=3, vlans=(10,), log_file=None, pool=None, compiled=False):
+    """
+    Host i gets MAC 00:00:00:00:xx:xx numbered from 1, VLAN vlans[i % len(vlans)]
+    and IP 192.168.<vlan>.<i + 1>. pool is used by the switch and every host.
+    Returns (fabric, switch, hosts).
+    """
+    fabric = FixedSwitchFabric(log_file=log_file)
+    switch = Switch(fabric, num_interfaces=max(n_hosts, 8))
+    switch.pool = pool
+    hosts = []
+    for i in range(n_hosts):
+        vlan_id = vlans[i % len(vlans)]
+        host = Host(f"00:00:00:00:{(i + 1) // 256:02X}:{(i + 1) % 256:02X}", i, vlan_id=vlan_id,
+                    ip_address=f"192.168.{vlan_id}.{i + 1}", pool=pool)
+        fabric.connect_host_to_switch(host, switch)
+        hosts.append(host)
+    if compiled:
+        switch.compile()
+    return fabric, switch, hosts
@@ -1,28 +1,101 @@
 from queue import Queue
+
+
+def open_log(log_file, header):
+    """
+    Return a write function for a log destination.
+    - str: path, truncated now and appended to on every write
+    - object with write(): e.g. io.StringIO for an in-memory log
+    - None: logging disabled
+    """
+    if log_file is None:
+        return lambda line: None
+    if hasattr(log_file, "write"):
+        log_file.write(header)
+        return log_file.write
+    with open(log_file, 'w') as f:
+        f.write(header)
+
+    def write(line):
+        with open(log_file, 'a') as f:
+            f.write(line)
+    return write
+
+
 class Bus:
-    def __init__(self):
+    def __init__(self, log_file="bus_log.txt", clock=None, bandwidth=10e6):
+        """
+        clock: optional link.SimClock; when given, the bus also keeps a simple
+        shared-medium model. Each frame holds the medium for its serialization
+        time at bandwidth bit/s, and a frame that finds the medium busy counts
+        as a collision and is sent once the medium is free.
+        """
         self.hosts = []
-        self.log_file = "bus_log.txt"
-        with open(self.log_file, 'w') as f:
-            f.write("Bus Log Started\n")
+        self.log_file = log_file
+        self.clock = clock
+        self.bandwidth = bandwidth
+        self.frames = 0
+        self.bytes = 0
+        self.deliveries = 0
+        self.collisions = 0
+        self.busy_time = 0.0
+        self.busy_until = 0.0
+        self._write_log = open_log(log_file, "Bus Log Started\n")
         self.log_event("Bus initialized")
 
     def log_event(self, message, category="INFO"):
-        with open(self.log_file, 'a') as f:
-            f.write(f"[{category}] {message}\n")
+        self._write_log(f"[{category}] {message}\n")
 
     def connect_host(self, host):
         self.hosts.append(host)
         self.log_event(f"Host {host.mac} connected to bus")
 
-    def broadcast(self, packet):
+    def broadcast(self, packet, sender=None):
+        """
+        Deliver a frame to every host except its source. sender is the
+        attached object that put the frame on the bus (e.g. a bridge port)
+        when that is not the host owning packet.src.
+        """
         self.log_event(f"Broadcasting packet: {packet}")
-        for host in self.hosts:
-            if host.mac != packet.src:
-                host.receive_packet(packet)
+        self.frames += 1
+        self.bytes += packet.size
+        if self.clock is not None:
+            tx = packet.size * 8 / self.bandwidth
+            start = self.clock.now
+            if self.busy_until > start:
+                self.collisions += 1
+                start = self.busy_until
+            self.busy_until = start + tx
+            self.busy_time += tx
+        src = packet.src
+        hosts = self.hosts
+        if sender is None:
+            for host in hosts:
+                if host.mac != src:
+                    host.receive_packet(packet)
+        else:
+            for host in hosts:
+                if host.mac != src and host is not sender:
+                    host.receive_packet(packet)
+        # Every attached host but the one that put the frame on the bus
+        self.deliveries += len(hosts) - 1
+
+    def stats(self):
+        elapsed = max(self.busy_until, self.clock.now) if self.clock is not None else 0.0
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "deliveries": self.deliveries,
+            "collisions": self.collisions,
+            "utilization": self.busy_time / elapsed if elapsed else 0.0,
+            "throughput_bps": self.bytes * 8 / elapsed if elapsed else 0.0,
+        }
 
 class Packet:
-    def __init__(self, src, dst, src_ip, dst_ip, payload, vlan_id=1):
+    # 对象池（pool.PacketPool）分配的数据包为True，持有者用完后需调用release()
+    pooled = False
+
+    def __init__(self, src, dst, src_ip, dst_ip, payload, vlan_id=1, priority=0, size=None, ttl=64):
         """
         初始化数据包。
         参数:
@@ -32,6 +105,9 @@ class Packet:
         - dst_ip: 目的IP地址
         - payload: 数据内容
         - vlan_id: VLAN ID（默认为1）
+        - priority: 802.1p 优先级 PCP（0-7，默认为0）
+        - size: 帧长度（字节），默认按以太网头部加负载估算，最小64字节
+        - ttl: 生存时间，每经过一次路由器间转发减1（默认64）
         """
         self.src = src
         self.dst = dst
@@ -39,24 +115,29 @@ class Packet:
         self.dst_ip = dst_ip
         self.payload = payload
         self.vlan_id = vlan_id
+        if not 0 <= priority <= 7:
+            raise ValueError("Invalid 802.1p priority")
+        self.priority = priority
+        if size is None:
+            size = max(64, 18 + len(str(payload).encode()))
+        self.size = size
+        self.ttl = ttl
 
     def __str__(self):
-        return f"Packet(src={self.src}, dst={self.dst}, src_ip={self.src_ip}, dst_ip={self.dst_ip}, payload={self.payload}, vlan_id={self.vlan_id})"
+        return f"Packet(src={self.src}, dst={self.dst}, src_ip={self.src_ip}, dst_ip={self.dst_ip}, payload={self.payload}, vlan_id={self.vlan_id}, priority={self.priority})"
 
 class SwitchFabric:
-    def __init__(self):
+    def __init__(self, log_file="fabric_log.txt"):
         self.queue = Queue()
         self.physical_map = {}
         self.interfaces = {}
         self.vlan_map = {}
-        self.log_file = "fabric_log.txt"
-        with open(self.log_file, 'w') as f:
-            f.write("Switch Fabric Log Started\n")
+        self.log_file = log_file
+        self._write_log = open_log(log_file, "Switch Fabric Log Started\n")
         self.log_event("Switch Fabric initialized")
 
     def log_event(self, message, category="INFO"):
-        with open(self.log_file, 'a') as f:
-            f.write(f"[{category}] {message}\n")
+        self._write_log(f"[{category}] {message}\n")
 
     def connect_host_to_switch(self, host, switch):
         switch.interfaces[host.interface] = host
@@ -88,5 +169,4 @@ class SwitchFabric:
         return src_interface, packet
 
     def log_packet(self, message):       
-        with open(self.log_file, 'a') as f:
-            f.write(f"{message}\n")
+        self._write_log(f"{message}\n")
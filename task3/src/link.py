@@ -0,0 +1,142 @@
+from heapq import heappush, heappop
+
+
+class SimClock:
+    """
+    Discrete-event clock shared by the fabric and its links.
+    Events are (time, seq, callback, args) tuples kept in a heap.
+    """
+    def __init__(self):
+        self.now = 0.0
+        self._events = []
+        self._seq = 0
+
+    def schedule(self, delay, callback, *args):
+        self._seq += 1
+        heappush(self._events, (self.now + delay, self._seq, callback, args))
+
+    def pending(self):
+        return len(self._events)
+
+    def run(self, until=None):
+        events = self._events
+        while events:
+            if until is not None and events[0][0] > until:
+                self.now = until
+                return
+            time, _, callback, args = heappop(events)
+            self.now = time
+            callback(*args)
+        if until is not None and until > self.now:
+            self.now = until
+
+
+class Link:
+    """
+    Point-to-point link from a switch port to the attached host.
+    Parameters:
+    - bandwidth: bits per second
+    - delay: propagation delay in seconds
+    """
+    def __init__(self, bandwidth=1e9, delay=0.0):
+        if bandwidth <= 0:
+            raise ValueError("Link bandwidth must be positive")
+        if delay < 0:
+            raise ValueError("Link delay must not be negative")
+        self.bandwidth = bandwidth
+        self.delay = delay
+
+    def serialization_delay(self, packet):
+        return packet.size * 8 / self.bandwidth
+
+
+class EgressPort:
+    """
+    Egress side of a switch port: a scheduler holding the queued packets,
+    feeding one Link. Only the packet on the wire has a pending event on the
+    clock, so the cost per packet is one heap push for transmission and one
+    for delivery.
+    """
+    def __init__(self, interface, link, clock, deliver, scheduler):
+        self.interface = interface
+        self.link = link
+        self.clock = clock
+        self.deliver = deliver
+        self.scheduler = scheduler
+        self.busy = False
+
+        self.enqueued = 0
+        self.transmitted = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.max_occupancy = 0
+        self.total_queue_delay = 0.0
+        self.busy_time = 0.0
+        # Time-weighted occupancy integral, advanced on every queue change
+        self._occupancy_area = 0.0
+        self._last_change = clock.now
+
+    def _account(self):
+        now = self.clock.now
+        self._occupancy_area += len(self.scheduler) * (now - self._last_change)
+        self._last_change = now
+
+    def enqueue(self, packet):
+        self._account()
+        before = len(self.scheduler)
+        if not self.scheduler.enqueue(packet, self.clock.now):
+            self.dropped += 1
+            return False
+        occupancy = len(self.scheduler)
+        if occupancy == before:
+            # Head drop: an older packet made room for this one
+            self.dropped += 1
+        self.enqueued += 1
+        if packet.pooled:
+            packet.refs += 1
+        if occupancy > self.max_occupancy:
+            self.max_occupancy = occupancy
+        if not self.busy:
+            self._start_next()
+        return True
+
+    def _start_next(self):
+        self._account()
+        packet, arrived, cls = self.scheduler.dequeue()
+        self.busy = True
+        self.total_queue_delay += self.clock.now - arrived
+        tx = self.link.serialization_delay(packet)
+        self.busy_time += tx
+        self.clock.schedule(tx, self._finish, packet, arrived, cls)
+
+    def _finish(self, packet, arrived, cls):
+        self.transmitted += 1
+        self.bytes_sent += packet.size
+        delay = self.link.delay
+        cls.record(packet, self.clock.now + delay - arrived)
+        self.clock.schedule(delay, self._deliver_pooled if packet.pooled else self.deliver, packet, self.interface)
+        if len(self.scheduler):
+            self._start_next()
+        else:
+            self.busy = False
+
+    def _deliver_pooled(self, packet, interface):
+        # The queue's reference is dropped once the receiver has taken its own
+        self.deliver(packet, interface)
+        packet.release()
+
+    def stats(self):
+        self._account()
+        elapsed = self.clock.now
+        return {
+            "enqueued": self.enqueued,
+            "transmitted": self.transmitted,
+            "dropped": self.dropped,
+            "bytes_sent": self.bytes_sent,
+            "occupancy": len(self.scheduler),
+            "max_occupancy": self.max_occupancy,
+            "avg_occupancy": self._occupancy_area / elapsed if elapsed else 0.0,
+            "avg_queue_delay": self.total_queue_delay / self.transmitted if self.transmitted else 0.0,
+            "utilization": min(self.busy_time / elapsed, 1.0) if elapsed else 0.0,
+            "classes": {cls.index: cls.stats(elapsed) for cls in self.scheduler.classes},
+        }
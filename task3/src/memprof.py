@@ -0,0 +1,294 @@
+"""
+Memory accounting per subsystem.
+
+tracemalloc records where every block was allocated; each trace is tagged
+with the subsystem owning the innermost Sim-LAN frame on its stack. Tags
+come from the enclosing class or function, and calls such as Packet(...)
+or log_event(...) override the enclosing code, so per-recipient packet
+copies made by Switch.flood_packet count as packets, not as switch tables.
+A class takes the tag of the first core class in its MRO, so subclasses of
+Host, Switch, Packet, ... need no entry here. Other classes belong to the
+subsystem of the module defining them: MODULE_TAGS for modules that extend
+a core subsystem, otherwise one named after the module (acl, storm,
+analytics, ...), so new modules are reported on their own. Code outside
+any class is not tagged; its blocks go to the class that called it.
+
+    profiler = MemoryProfiler()
+    profiler.start()
+    ...                              # build the lab, send traffic
+    before = profiler.snapshot("warm")
+    ...                              # soak
+    after = profiler.snapshot("soak")
+    print(format_diff(after.diff(before)))
+"""
+import argparse
+import ast
+import linecache
+import os
+import random
+import sys
+import tracemalloc
+
+from forwarding_plan import PLAN_FILENAME_PREFIX
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Core subsystems, always reported; modules without a MODULE_TAGS entry add their own
+SUBSYSTEMS = ("hosts", "switch_tables", "router", "fabric", "packets", "logger", "other")
+
+# Core classes; subclasses are tagged through their MRO
+CLASS_TAGS = {
+    "Host": "hosts",
+    "Switch": "switch_tables",
+    "MulticastTable": "switch_tables",
+    "HashGroup": "switch_tables",
+    "Router": "router",
+    "SwitchFabric": "fabric",
+    "Bus": "fabric",
+    "SimClock": "fabric",
+    "EgressPort": "fabric",
+    "Packet": "packets",
+}
+FUNCTION_TAGS = {"open_log": "logger", "log_event": "logger", "log_packet": "logger"}
+CALL_TAGS = {"Packet": "packets", "log_event": "logger", "log_packet": "logger", "_write_log": "logger",
+             "print": "logger"}
+MODULE_TAGS = {"link.py": "fabric", "qos.py": "fabric", "bridge.py": "fabric", "lag.py": "switch_tables",
+               "multicast.py": "switch_tables", "forwarding_plan.py": "switch_tables", "routing.py": "router",
+               "pool.py": "packets"}
+
+_line_tags = {}
+
+
+def module_tag(filename):
+    """Subsystem of the classes a Sim-LAN module defines that derive from no core class, or None."""
+    name = os.path.basename(filename)
+    if filename.startswith(PLAN_FILENAME_PREFIX):
+        # Compiled forwarding plans: their own blocks are learned table entries
+        return MODULE_TAGS["forwarding_plan.py"]
+    if name in MODULE_TAGS:
+        return MODULE_TAGS[name]
+    if name.startswith("test") or not name.endswith(".py"):
+        return None
+    return name[:-3]
+
+
+def _loaded_module(filename):
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.abspath(path) == filename:
+            return module
+    return None
+
+
+def class_tag(node, module, default):
+    """
+    Tag of a class definition: the first core class in the MRO of the class
+    (or, for classes nested in functions, of its bases) found in module.
+    """
+    if node.name in CLASS_TAGS:
+        return CLASS_TAGS[node.name]
+    names = [node.name] + [base.id if isinstance(base, ast.Name) else getattr(base, "attr", None)
+                           for base in node.bases]
+    for name in names:
+        cls = getattr(module, name, None) if name else None
+        if isinstance(cls, type):
+            for ancestor in cls.__mro__:
+                if ancestor.__name__ in CLASS_TAGS:
+                    return CLASS_TAGS[ancestor.__name__]
+    return default
+
+
+def _tag_lines(filename):
+    """Map line numbers of one source file to subsystem tags using its AST."""
+    tags = {}
+    plan = filename.startswith(PLAN_FILENAME_PREFIX)
+    default = module_tag(filename)
+    # Code outside classes is tagged only in plans, which have no classes
+    loose = default if plan else None
+    try:
+        tree = ast.parse("".join(linecache.getlines(filename)))
+    except SyntaxError:
+        return tags, loose
+    module = None if plan else _loaded_module(filename)
+
+    def mark(node, tag):
+        for line in range(node.lineno, (node.end_lineno or node.lineno) + 1):
+            tags[line] = tag
+
+    # Outer definitions first so that nested and call-level tags win
+    definitions = [n for n in ast.walk(tree) if isinstance(n, (ast.ClassDef, ast.FunctionDef))]
+    for node in sorted(definitions, key=lambda n: n.end_lineno - n.lineno, reverse=True):
+        if isinstance(node, ast.ClassDef):
+            tag = class_tag(node, module, default)
+        else:
+            tag = FUNCTION_TAGS.get(node.name)
+        if tag:
+            mark(node, tag)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+            if name in CALL_TAGS:
+                mark(node, CALL_TAGS[name])
+    return tags, loose
+
+
+def classify(traceback):
+    """Subsystem of a traceback, or None when no Sim-LAN frame is on it."""
+    found = False
+    for frame in reversed(traceback):
+        filename = frame.filename
+        plan = filename.startswith(PLAN_FILENAME_PREFIX)
+        if not (plan or filename.startswith(SRC_DIR)) or filename == __file__:
+            continue
+        found = True
+        if plan:
+            # A plan is rebuilt under the same name when its switch is reconfigured
+            key = (filename, "".join(linecache.getlines(filename)))
+        else:
+            key = filename
+        if key not in _line_tags:
+            _line_tags[key] = _tag_lines(filename)
+        tags, default = _line_tags[key]
+        tag = tags.get(frame.lineno, default)
+        if tag:
+            return tag
+    return "other" if found else None
+
+
+class MemorySnapshot:
+    def __init__(self, label, snapshot):
+        self.label = label
+        self.snapshot = snapshot
+        self.by_subsystem = {name: [0, 0] for name in SUBSYSTEMS}
+        # Grouping by traceback first means each distinct stack is classified once
+        for stat in snapshot.statistics("traceback"):
+            tag = classify(stat.traceback)
+            if tag is not None:
+                entry = self.by_subsystem.setdefault(tag, [0, 0])
+                entry[0] += stat.size
+                entry[1] += stat.count
+
+    def bytes(self, subsystem):
+        return self.by_subsystem.get(subsystem, (0, 0))[0]
+
+    def total(self):
+        return sum(size for size, _ in self.by_subsystem.values())
+
+    def diff(self, older):
+        """Per-subsystem (bytes delta, blocks delta) from an older snapshot to this one."""
+        names = list(self.by_subsystem) + [name for name in older.by_subsystem if name not in self.by_subsystem]
+        empty = (0, 0)
+        return {name: (self.by_subsystem.get(name, empty)[0] - older.by_subsystem.get(name, empty)[0],
+                       self.by_subsystem.get(name, empty)[1] - older.by_subsystem.get(name, empty)[1])
+                for name in names}
+
+    def top_growth(self, older, limit=10):
+        """Source lines that grew the most since the older snapshot."""
+        return self.snapshot.compare_to(older.snapshot, "lineno")[:limit]
+
+
+class MemoryProfiler:
+    def __init__(self, nframes=8):
+        self.nframes = nframes
+        self.snapshots = []
+        self.peak = 0
+
+    def start(self):
+        tracemalloc.start(self.nframes)
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def snapshot(self, label=None):
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        snap = MemorySnapshot(label or f"snapshot {len(self.snapshots)}", tracemalloc.take_snapshot())
+        self.snapshots.append(snap)
+        return snap
+
+
+def unit_costs(snapshot, hosts, switches):
+    """Bytes per host, per learned MAC entry and per packet held in host buffers."""
+    n_hosts = len(hosts)
+    mac_entries = sum(len(switch.mac_table) for switch in switches)
+    packets = sum(len(host.buffer) for host in hosts)
+    return {
+        "bytes_per_host": snapshot.bytes("hosts") / n_hosts if n_hosts else 0.0,
+        "bytes_per_mac_entry": snapshot.bytes("switch_tables") / mac_entries if mac_entries else 0.0,
+        "bytes_per_packet": snapshot.bytes("packets") / packets if packets else 0.0,
+    }
+
+
+def format_snapshot(snapshot):
+    lines = [f"{snapshot.label}: {snapshot.total() / 1024:.1f} KiB traced",
+             f"{'subsystem':<15} {'KiB':>10} {'blocks':>10}"]
+    for name, (size, blocks) in snapshot.by_subsystem.items():
+        lines.append(f"{name:<15} {size / 1024:>10.1f} {blocks:>10}")
+    return "\n".join(lines)
+
+
+def format_diff(diff):
+    lines = [f"{'subsystem':<15} {'KiB delta':>10} {'blocks delta':>13}"]
+    for name, (size, blocks) in sorted(diff.items(), key=lambda item: -item[1][0]):
+        lines.append(f"{name:<15} {size / 1024:>+10.1f} {blocks:>+13}")
+    return "\n".join(lines)
+
+
+def soak(n_hosts=128, rounds=5, packets_per_round=2000, seed=0):
+    """Build a star LAN, send traffic in rounds and snapshot memory after each round."""
+    import io
+    from contextlib import redirect_stdout
+    from Sim_LAN1225 import Host, Switch, FixedSwitchFabric
+
+    rng = random.Random(seed)
+    profiler = MemoryProfiler()
+    profiler.start()
+    fabric = FixedSwitchFabric(log_file=io.StringIO())
+    switch = Switch(fabric, num_interfaces=n_hosts)
+    hosts = []
+    for i in range(n_hosts):
+        host = Host(f"00:00:00:00:{i // 256:02X}:{i % 256:02X}", i, vlan_id=10, ip_address=f"10.0.{i // 256}.{i % 256}")
+        fabric.connect_host_to_switch(host, switch)
+        hosts.append(host)
+    snapshots = [profiler.snapshot("topology")]
+    with redirect_stdout(io.StringIO()):
+        for r in range(rounds):
+            for _ in range(packets_per_round):
+                a, b = rng.sample(hosts, 2)
+                if rng.random() < 0.05:
+                    a.send_packet("FF:FF:FF:FF:FF:FF", "bcast", switch, "255.255.255.255")
+                else:
+                    a.send_packet(b.mac, "payload", switch, b.ip_address)
+            snapshots.append(profiler.snapshot(f"round {r + 1}"))
+    profiler.stop()
+    return profiler, snapshots, hosts, [switch]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-subsystem memory accounting for a Sim-LAN soak test")
+    parser.add_argument("--hosts", type=int, default=128)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--packets", type=int, default=2000, help="packets per round")
+    args = parser.parse_args(argv)
+
+    profiler, snapshots, hosts, switches = soak(args.hosts, args.rounds, args.packets)
+    last = snapshots[-1]
+    print(format_snapshot(last))
+    for name, value in unit_costs(last, hosts, switches).items():
+        print(f"{name}: {value:.1f}")
+    print(f"peak traced: {profiler.peak / 1024:.1f} KiB")
+    print(f"\nGrowth {snapshots[1].label} -> {last.label}:")
+    print(format_diff(last.diff(snapshots[1])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+IGMP_MAC = "01:00:5E:00:00:16"
+# No querier runs in the simulation, so memberships only expire when a timeout is set
+DEFAULT_MEMBERSHIP_TIMEOUT = None
+
+
+def is_multicast(mac):
+    # I/G bit of the first octet; broadcast is checked separately by callers
+    return int(mac[:2], 16) & 1 == 1
+
+
+def group_mac_for_ip(group_ip):
+    """
+    Map an IPv4 multicast group to its MAC address (01:00:5E + low 23 bits).
+    """
+    octets = [int(o) for o in group_ip.split(".")]
+    if not 224 <= octets[0] <= 239:
+        raise ValueError(f"Not an IPv4 multicast address: {group_ip}")
+    return "01:00:5E:{:02X}:{:02X}:{:02X}".format(octets[1] & 0x7F, octets[2], octets[3])
+
+
+class IgmpMessage:
+    """Payload of a membership report ("join") or leave sent by a Host."""
+    def __init__(self, kind, group):
+        if kind not in ("join", "leave"):
+            raise ValueError(f"Unknown IGMP message: {kind}")
+        self.kind = kind
+        self.group = group.upper()
+
+    def __str__(self):
+        return f"IGMP {self.kind} {self.group}"
+
+
+class MulticastTable:
+    """
+    Snooped group membership: vlan_id -> group MAC -> {interface: expiry}.
+    Expired members are pruned lazily when a group is looked up, so a lookup
+    costs O(members of that group) regardless of VLAN size.
+
+    membership_timeout: seconds a report keeps a port subscribed (e.g. 260,
+    the IGMPv2 default), or None to keep it until the host leaves. With a
+    timeout, hosts must refresh memberships by joining again.
+    """
+    def __init__(self, membership_timeout=DEFAULT_MEMBERSHIP_TIMEOUT):
+        self.membership_timeout = membership_timeout
+        self.groups = {}
+
+    def join(self, vlan_id, group, interface, now):
+        timeout = self.membership_timeout
+        expiry = now + timeout if timeout is not None else float("inf")
+        self.groups.setdefault(vlan_id, {}).setdefault(group, {})[interface] = expiry
+
+    def leave(self, vlan_id, group, interface):
+        vlan_groups = self.groups.get(vlan_id)
+        if not vlan_groups or group not in vlan_groups:
+            return
+        members = vlan_groups[group]
+        members.pop(interface, None)
+        if not members:
+            del vlan_groups[group]
+
+    def members(self, vlan_id, group, now):
+        vlan_groups = self.groups.get(vlan_id)
+        if not vlan_groups:
+            return ()
+        members = vlan_groups.get(group)
+        if not members:
+            return ()
+        expired = [iface for iface, expiry in members.items() if expiry <= now]
+        for iface in expired:
+            del members[iface]
+        if not members:
+            del vlan_groups[group]
+            return ()
+        return members.keys()
+
+    def remove_interface(self, interface):
+        for vlan_groups in self.groups.values():
+            for group in list(vlan_groups):
+                vlan_groups[group].pop(interface, None)
+                if not vlan_groups[group]:
+                    del vlan_groups[group]
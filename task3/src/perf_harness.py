@@ -0,0 +1,408 @@
+"""
+Performance regression harness.
+
+Runs a fixed, seeded set of micro and macro workloads over the forwarding
+entry points and compares them with the baselines stored in perf_baselines/.
+
+    python perf_harness.py             # compare, exit 1 on regression
+    python perf_harness.py --update    # re-record baselines on this machine
+    python perf_harness.py --only router.route --justify "why it is slower"
+
+Every workload names the functions it benchmarks, and each baseline stores
+a fingerprint of their source. A change to one of them makes the baseline
+stale (test_perf_harness fails) until the harness is run again and the
+baseline is either re-recorded with --update or kept with --justify, which
+records the reason next to the old numbers.
+"""
+import argparse
+import gc
+import inspect
+import io
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+import zlib
+from contextlib import redirect_stdout
+
+from Sim_LAN1225 import Host, Switch, Router, SwitchFabric, FixedSwitchFabric, Packet
+from lib_final import Bus
+from link import EgressPort
+from qos import Scheduler, StrictPriorityScheduler
+from forwarding_plan import plan_source, _emit_forward
+from pool import PacketPool, PooledPacket
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_baselines")
+THROUGHPUT_TOLERANCE = 0.25
+ALLOCATION_TOLERANCE = 0.10
+# Untimed samples at the start of every measurement, while caches, the allocator and the CPU clock settle
+WARMUP = 2
+WARMUP_SECONDS = 0.25
+# Each timed sample repeats the workload until it covers at least this long
+MIN_SAMPLE_SECONDS = 0.02
+
+WORKLOADS = {}
+
+
+def workload(name, ops, entry_points):
+    """
+    Register setup(rng) -> run() as a workload performing ops operations per
+    run. entry_points are the functions whose cost it measures.
+    """
+    def register(setup):
+        WORKLOADS[name] = (setup, ops, entry_points)
+        return setup
+    return register
+
+
+def fingerprint(name):
+    """Checksum of the source of a workload's entry points."""
+    source = "".join(inspect.getsource(fn) for fn in WORKLOADS[name][2])
+    return f"{zlib.crc32(source.encode()):08x}"
+
+
+def star(rng, n_hosts, vlans=(10,)):
+    fabric = FixedSwitchFabric(log_file=None)
+    switch = Switch(fabric, num_interfaces=n_hosts)
+    hosts = []
+    for i in range(n_hosts):
+        vlan_id = vlans[i % len(vlans)]
+        host = Host(f"00:00:00:00:{i // 256:02X}:{i % 256:02X}", i, vlan_id=vlan_id,
+                    ip_address=f"10.{vlan_id}.{i // 256}.{i % 256}")
+        fabric.connect_host_to_switch(host, switch)
+        hosts.append(host)
+    return fabric, switch, hosts
+
+
+@workload("switch.unicast", ops=5000,
+          entry_points=(Switch.handle_packet, Switch.forward, SwitchFabric.forward_to_interface,
+                        SwitchFabric._deliver, Host.receive_packet))
+def setup_switch_unicast(rng):
+    _, switch, hosts = star(rng, 64)
+    pairs = [rng.sample(hosts, 2) for _ in range(5000)]
+    packets = [(Packet(a.mac, b.mac, a.ip_address, b.ip_address, "x", vlan_id=10), a.interface) for a, b in pairs]
+
+    def run():
+        for packet, interface in packets:
+            switch.handle_packet(packet, interface)
+    return run
+
+
+@workload("switch.flood", ops=200,
+          entry_points=(Switch.handle_packet, Switch.flood_packet, Switch.forward, SwitchFabric.forward_to_interface,
+                        SwitchFabric._deliver, Host.receive_packet))
+def setup_switch_flood(rng):
+    _, switch, hosts = star(rng, 64, vlans=(10, 20))
+    senders = [rng.choice(hosts) for _ in range(200)]
+    packets = [(Packet(h.mac, "FF:FF:FF:FF:FF:FF", h.ip_address, "255.255.255.255", "x", vlan_id=h.vlan_id), h.interface)
+               for h in senders]
+
+    def run():
+        for packet, interface in packets:
+            switch.handle_packet(packet, interface)
+    return run
+
+
+@workload("switch.flood.compiled", ops=200,
+          entry_points=(plan_source, _emit_forward, Switch.compile, Host.receive_packet))
+def setup_switch_flood_compiled(rng):
+    _, switch, hosts = star(rng, 64, vlans=(10, 20))
+    switch.compile()
+    senders = [rng.choice(hosts) for _ in range(200)]
+    packets = [(Packet(h.mac, "FF:FF:FF:FF:FF:FF", h.ip_address, "255.255.255.255", "x", vlan_id=h.vlan_id), h.interface)
+               for h in senders]
+
+    def run():
+        for packet, interface in packets:
+            switch.handle_packet(packet, interface)
+    return run
+
+
+@workload("switch.flood.pooled", ops=200,
+          entry_points=(Host.send_packet, Host.consume, Switch.handle_packet, Switch.flood_packet, PacketPool.acquire,
+                        PooledPacket.release, SwitchFabric.forward_to_interface, Host.receive_packet))
+def setup_switch_flood_pooled(rng):
+    _, switch, hosts = star(rng, 64, vlans=(10, 20))
+    switch.pool = pool = PacketPool(2048)
+    for host in hosts:
+        host.pool = pool
+    senders = [rng.choice(hosts) for _ in range(200)]
+
+    def run():
+        for i, host in enumerate(senders):
+            host.send_packet("FF:FF:FF:FF:FF:FF", "x", switch, "255.255.255.255")
+            if i % 8 == 7:
+                for receiver in hosts:
+                    receiver.consume()
+    return run
+
+
+@workload("bus.broadcast", ops=2000,
+          entry_points=(Bus.broadcast,))
+def setup_bus_broadcast(rng):
+    bus = Bus(log_file=None)
+    hosts = [Host(f"00:00:00:00:00:{i:02X}", i) for i in range(32)]
+    for host in hosts:
+        bus.connect_host(host)
+    pairs = [rng.sample(hosts, 2) for _ in range(2000)]
+    packets = [Packet(a.mac, b.mac, a.ip_address, b.ip_address, "x") for a, b in pairs]
+
+    def run():
+        for packet in packets:
+            bus.broadcast(packet)
+    return run
+
+
+@workload("router.route", ops=5000,
+          entry_points=(Router.route_packet, Host.receive_packet))
+def setup_router_route(rng):
+    router = Router()
+    hosts = [Host(f"00:00:00:00:01:{i:02X}", i, vlan_id=100 + i, ip_address=f"10.1.0.{i}") for i in range(64)]
+    for host in hosts:
+        router.add_route(host.ip_address, None, interface=host)
+    targets = [rng.choice(hosts) for _ in range(5000)]
+    packets = [Packet("00:00:00:00:00:01", h.mac, "10.0.0.1", h.ip_address, "x") for h in targets]
+
+    def run():
+        for packet in packets:
+            router.route_packet(packet, 1)
+    return run
+
+
+@workload("fabric.inter_vlan", ops=2000,
+          entry_points=(Host.send_packet, Switch.handle_packet, Router.route_packet,
+                        SwitchFabric.forward_to_interface, SwitchFabric._deliver, Host.receive_packet))
+def setup_inter_vlan(rng):
+    _, switch, hosts = star(rng, 32, vlans=(10, 20))
+    switch.router = Router()
+    for host in hosts:
+        switch.router.add_route(host.ip_address, None, interface=host)
+    pairs = []
+    while len(pairs) < 2000:
+        a, b = rng.sample(hosts, 2)
+        if a.vlan_id != b.vlan_id:
+            pairs.append((a, b))
+
+    def run():
+        for a, b in pairs:
+            a.send_packet(b.mac, "x", switch, b.ip_address)
+    return run
+
+
+@workload("fabric.link_queue", ops=2000,
+          entry_points=(Switch.handle_packet, SwitchFabric.forward_to_interface, EgressPort.enqueue,
+                        EgressPort._start_next, EgressPort._finish, Scheduler.enqueue, Scheduler.dequeue,
+                        StrictPriorityScheduler._select))
+def setup_link_queue(rng):
+    fabric, switch, hosts = star(rng, 16)
+    for host in hosts:
+        fabric.set_link(host.interface, bandwidth=1e9, delay=1e-6, queue_depth=256)
+    pairs = [rng.sample(hosts, 2) for _ in range(2000)]
+
+    def run():
+        for a, b in pairs:
+            a.send_packet(b.mac, "x" * 200, switch, b.ip_address)
+        fabric.run()
+    return run
+
+
+def _reference_loop(n=20000):
+    """
+    Fixed pure-Python workload timed next to every sample. Scores are
+    stored relative to it so that baselines survive a change of machine or
+    CPU frequency.
+    """
+    table = {}
+    packet = Packet("00:00:00:00:00:01", "00:00:00:00:00:02", "10.0.0.1", "10.0.0.2", "x")
+    for i in range(n):
+        table[i & 255] = packet.dst
+        if packet.src in table:
+            pass
+    return n
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def count_calls(fn, *args):
+    """
+    Python and builtin function calls made by fn(*args): a deterministic
+    measure of work for tests that compare two code paths, where wall time
+    depends on the machine.
+    """
+    calls = 0
+
+    def profile(frame, event, arg):
+        nonlocal calls
+        if event == "call" or event == "c_call":
+            calls += 1
+
+    sys.setprofile(profile)
+    try:
+        fn(*args)
+    finally:
+        sys.setprofile(None)
+    return calls
+
+
+def _sample(setup, seed, loops, sink):
+    """Time loops fresh runs of a workload, next to as many reference loops."""
+    elapsed = reference = 0.0
+    for _ in range(loops):
+        run = setup(random.Random(seed))
+        gc.collect()
+        gc.disable()
+        try:
+            with redirect_stdout(sink):
+                reference += _timed(_reference_loop)
+                elapsed += _timed(run)
+        finally:
+            gc.enable()
+        sink.seek(0)
+        sink.truncate()
+    return elapsed, reference
+
+
+def measure(name, repeats=15, seed=315, warmup=WARMUP):
+    setup, ops, _ = WORKLOADS[name]
+    sink = io.StringIO()
+    # The warmup samples also size the timed ones: short workloads are run several times per sample
+    loops = 1
+    started = time.perf_counter()
+    for count in itertools.count(1):
+        elapsed, _ = _sample(setup, seed, loops, sink)
+        loops = max(loops, math.ceil(MIN_SAMPLE_SECONDS * loops / max(elapsed, 1e-9)))
+        if count >= warmup and time.perf_counter() - started >= WARMUP_SECONDS:
+            break
+    samples = []
+    references = []
+    for _ in range(repeats):
+        elapsed, reference = _sample(setup, seed, loops, sink)
+        samples.append(elapsed / loops)
+        references.append(reference / loops)
+
+    # Allocation profile from one extra run, outside the timed repetitions
+    run = setup(random.Random(seed))
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    with redirect_stdout(sink):
+        run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks_before
+
+    # Interference only ever makes a run slower, so the best sample of each is the least noisy
+    best = min(samples)
+    return {
+        "ops_per_sec": ops / best,
+        # Operations per reference-loop duration, compared across machines
+        "relative_ops": ops * min(references) / best,
+        "blocks_per_op": max(blocks, 0) / ops,
+        "peak_bytes_per_op": peak / ops,
+        "samples": len(samples),
+        "loops": loops,
+        "spread": max(samples) / best - 1,
+    }
+
+
+def compare(name, baseline, current, throughput_tolerance=THROUGHPUT_TOLERANCE,
+            allocation_tolerance=ALLOCATION_TOLERANCE):
+    """Return (rows, regressed) where rows are (workload, metric, baseline, current, change, status)."""
+    rows = []
+    regressed = False
+    checks = (
+        ("relative_ops", True, throughput_tolerance),
+        ("blocks_per_op", False, allocation_tolerance),
+        ("peak_bytes_per_op", False, allocation_tolerance),
+    )
+    for metric, higher_is_better, tolerance in checks:
+        old, new = baseline[metric], current[metric]
+        change = (new - old) / old if old else 0.0
+        if higher_is_better:
+            bad = new < old * (1 - tolerance)
+        else:
+            # One block / byte per op of slack keeps tiny baselines from flapping
+            bad = new > old * (1 + tolerance) + 1
+        regressed |= bad
+        rows.append((name, metric, old, new, change, "REGRESSION" if bad else "ok"))
+    return rows, regressed
+
+
+def format_rows(rows):
+    lines = [f"{'workload':<22} {'metric':<18} {'baseline':>12} {'current':>12} {'change':>8}  status"]
+    for name, metric, old, new, change, status in rows:
+        lines.append(f"{name:<22} {metric:<18} {old:>12.1f} {new:>12.1f} {change:>+7.1%}  {status}")
+    return "\n".join(lines)
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def is_stale(name, baseline):
+    """True if an entry point changed since the baseline was recorded or last justified."""
+    return baseline.get("entry_points") != fingerprint(name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sim-LAN performance regression harness")
+    parser.add_argument("--update", action="store_true", help="record new baselines instead of comparing")
+    parser.add_argument("--justify", metavar="REASON",
+                        help="keep the stored numbers but accept the current entry points, recording why")
+    parser.add_argument("--only", nargs="*", help="workload names to run")
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--tolerance", type=float, default=THROUGHPUT_TOLERANCE,
+                        help="allowed fractional drop in relative throughput")
+    args = parser.parse_args(argv)
+
+    names = args.only or sorted(WORKLOADS)
+    rows = []
+    regressed = False
+    for name in names:
+        current = measure(name, repeats=args.repeats)
+        current["entry_points"] = fingerprint(name)
+        path = baseline_path(name)
+        if args.update:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(current, f, indent=2, sort_keys=True)
+                f.write("\n")
+            print(f"{name}: {current['ops_per_sec']:.0f} ops/s recorded")
+            continue
+        if not os.path.exists(path):
+            print(f"{name}: no baseline, run with --update")
+            regressed = True
+            continue
+        with open(path) as f:
+            baseline = json.load(f)
+        workload_rows, bad = compare(name, baseline, current, throughput_tolerance=args.tolerance)
+        rows.extend(workload_rows)
+        if args.justify:
+            baseline["entry_points"] = current["entry_points"]
+            baseline.setdefault("notes", []).append(
+                f"{args.justify} (measured {current['relative_ops']:.0f} relative ops)")
+            with open(path, 'w') as f:
+                json.dump(baseline, f, indent=2, sort_keys=True)
+                f.write("\n")
+            print(f"{name}: baseline kept, justification recorded")
+        elif is_stale(name, baseline):
+            print(f"{name}: entry points changed since the baseline was recorded; "
+                  f"re-record it with --update or keep it with --justify")
+            bad = True
+        regressed |= bad
+    if rows:
+        print(format_rows(rows))
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,269 @@
+"""
+Packet object pool for long forwarding runs.
+
+PacketPool hands out preallocated PooledPacket slots from a free list
+instead of building a new Packet per frame. A pooled frame is reference
+counted: whoever acquires it holds one reference, every Host buffer and
+egress queue that keeps it takes another, and each holder releases its
+reference when done (Host.consume() for hosts). The slot goes back on the
+free list when the count drops to zero. Frames still referenced are
+reported by leaks().
+
+With a PacketArena the header fields of every slot live in
+struct-of-arrays columns, optionally in shared memory, where another
+process can read them with PacketArena.attach().
+"""
+from array import array
+from multiprocessing import shared_memory
+
+from lib_final import Packet
+from acl import ip_to_int
+
+
+class PooledPacket(Packet):
+    pooled = True
+
+    def __init__(self, pool, slot):
+        # Fields are filled by PacketPool.acquire
+        self.pool = pool
+        self.slot = slot
+        self.refs = 0
+        self.acquired = 0
+
+    def retain(self):
+        self.refs += 1
+
+    def release(self):
+        refs = self.refs - 1
+        if refs > 0:
+            self.refs = refs
+            return
+        if refs < 0:
+            raise ValueError(f"Packet in slot {self.slot} released more often than it was retained")
+        self.refs = 0
+        self.payload = None
+        pool = self.pool
+        pool.free.append(self)
+        pool.releases += 1
+
+
+def _mac_to_int(mac):
+    return int(mac.replace(":", ""), 16)
+
+
+def _int_to_mac(value):
+    digits = f"{value:012X}"
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def _int_to_ip(value):
+    if value < 0:
+        return None
+    return ".".join(str(value >> shift & 0xFF) for shift in (24, 16, 8, 0))
+
+
+class PacketArena:
+    """
+    Struct-of-arrays store for packet headers: one column per field, one
+    row per pool slot. MACs are stored as 48-bit integers and IPv4 addresses
+    as integers (-1 if the address is not dotted-quad). Payloads stay in the
+    owning process.
+    """
+    COLUMNS = (("in_use", "B"), ("src", "Q"), ("dst", "Q"), ("src_ip", "q"), ("dst_ip", "q"),
+               ("vlan_id", "i"), ("priority", "B"), ("size", "I"), ("ttl", "i"))
+    ENCODERS = {"src": _mac_to_int, "dst": _mac_to_int, "src_ip": ip_to_int, "dst_ip": ip_to_int}
+
+    def __init__(self, capacity, shared=False, name=None, create=True):
+        self.capacity = capacity
+        layout = []
+        offset = 0
+        for field, code in self.COLUMNS:
+            layout.append((field, code, offset))
+            offset += -(-capacity * array(code).itemsize // 8) * 8
+        self.nbytes = offset
+        self.shm = None
+        if shared:
+            self.shm = shared_memory.SharedMemory(name=name, create=create, size=max(offset, 1))
+            buffer = self.shm.buf
+        else:
+            buffer = memoryview(bytearray(max(offset, 1)))
+        self.name = self.shm.name if self.shm is not None else None
+        self.columns = {field: buffer[start:start + capacity * array(code).itemsize].cast(code)
+                        for field, code, start in layout}
+
+    @classmethod
+    def attach(cls, name, capacity):
+        """Open an arena created by another process."""
+        return cls(capacity, shared=True, name=name, create=False)
+
+    def header(self, slot):
+        """Decoded header of one slot, or None if the slot is free."""
+        columns = self.columns
+        if not columns["in_use"][slot]:
+            return None
+        return {
+            "src": _int_to_mac(columns["src"][slot]),
+            "dst": _int_to_mac(columns["dst"][slot]),
+            "src_ip": _int_to_ip(columns["src_ip"][slot]),
+            "dst_ip": _int_to_ip(columns["dst_ip"][slot]),
+            "vlan_id": columns["vlan_id"][slot],
+            "priority": columns["priority"][slot],
+            "size": columns["size"][slot],
+            "ttl": columns["ttl"][slot],
+        }
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        self.columns = {}
+        if self.shm is not None:
+            self.shm.close()
+
+    def unlink(self):
+        if self.shm is not None:
+            self.shm.unlink()
+
+
+def _column_field(field):
+    """Header field stored only in the arena column."""
+    def get(self):
+        return self.columns[field][self.slot]
+
+    def set(self, value):
+        self.columns[field][self.slot] = value
+    return property(get, set)
+
+
+def _address_field(field):
+    """
+    Address field kept as the string it was set to, so local reads see it
+    unchanged, and written encoded to the arena column for other processes.
+    """
+    local = "_" + field
+    encode = PacketArena.ENCODERS[field]
+
+    def get(self):
+        return getattr(self, local)
+
+    def set(self, value):
+        setattr(self, local, value)
+        self.columns[field][self.slot] = encode(value)
+    return property(get, set)
+
+
+class ArenaPacket(PooledPacket):
+    """
+    Pool slot backed by a PacketArena row: vlan_id, priority, size and ttl
+    are read from and written to the arena columns, addresses are also kept
+    as strings (see _address_field). The payload stays on the object.
+    """
+    src = _address_field("src")
+    dst = _address_field("dst")
+    src_ip = _address_field("src_ip")
+    dst_ip = _address_field("dst_ip")
+    vlan_id = _column_field("vlan_id")
+    priority = _column_field("priority")
+    size = _column_field("size")
+    ttl = _column_field("ttl")
+
+    def __init__(self, pool, slot):
+        self.columns = pool.arena.columns
+        super().__init__(pool, slot)
+
+    def release(self):
+        super().release()
+        if self.refs == 0:
+            self.columns["in_use"][self.slot] = 0
+
+
+class PacketPool:
+    """
+    Parameters:
+    - capacity: slots preallocated up front
+    - grow: when the free list is empty, add a slot (True) or hand out an
+      ordinary, unpooled Packet (False). Both count as misses.
+    - arena: optional PacketArena holding slot headers; its capacity caps
+      the pool, so growing is disabled
+    """
+    def __init__(self, capacity=1024, grow=True, arena=None):
+        if arena is not None and arena.capacity < capacity:
+            raise ValueError("Arena is smaller than the pool")
+        self.arena = arena
+        self.grow = grow and arena is None
+        self.slot_type = ArenaPacket if arena is not None else PooledPacket
+        self.slots = [self.slot_type(self, i) for i in range(capacity)]
+        self.free = self.slots[::-1]
+        self.acquisitions = 0
+        self.hits = 0
+        self.misses = 0
+        self.releases = 0
+        self._low_water = capacity
+
+    def acquire(self, src, dst, src_ip, dst_ip, payload, vlan_id=1, priority=0, size=None, ttl=64):
+        """Return a frame holding one reference for the caller."""
+        self.acquisitions += 1
+        free = self.free
+        if free:
+            packet = free.pop()
+            self.hits += 1
+        elif self.grow:
+            packet = self.slot_type(self, len(self.slots))
+            self.slots.append(packet)
+            self.misses += 1
+        else:
+            self.misses += 1
+            return Packet(src, dst, src_ip, dst_ip, payload, vlan_id, priority, size, ttl)
+        if not 0 <= priority <= 7:
+            free.append(packet)
+            raise ValueError("Invalid 802.1p priority")
+        # Same fields as Packet.__init__, set without the extra call
+        packet.src = src
+        packet.dst = dst
+        packet.src_ip = src_ip
+        packet.dst_ip = dst_ip
+        packet.payload = payload
+        packet.vlan_id = vlan_id
+        packet.priority = priority
+        packet.size = size if size is not None else max(64, 18 + len(str(payload).encode()))
+        packet.ttl = ttl
+        packet.refs = 1
+        packet.acquired = self.acquisitions
+        if self.arena is not None:
+            self.arena.columns["in_use"][packet.slot] = 1
+        if len(free) < self._low_water:
+            self._low_water = len(free)
+        return packet
+
+    def release(self, packet):
+        packet.release()
+
+    def in_use(self):
+        return len(self.slots) - len(self.free)
+
+    def peak_in_use(self):
+        # Slots added by growing were all in use when they were created
+        return len(self.slots) - self._low_water
+
+    def hit_rate(self):
+        return self.hits / self.acquisitions if self.acquisitions else 1.0
+
+    def leaks(self, min_age=0):
+        """
+        Frames still referenced that were acquired at least min_age
+        acquisitions ago, oldest first.
+        """
+        newest = self.acquisitions - min_age
+        return sorted((p for p in self.slots if p.refs > 0 and p.acquired <= newest),
+                      key=lambda p: p.acquired)
+
+    def stats(self, leak_age=0):
+        return {
+            "capacity": len(self.slots),
+            "in_use": self.in_use(),
+            "peak_in_use": self.peak_in_use(),
+            "acquisitions": self.acquisitions,
+            "hit_rate": self.hit_rate(),
+            "misses": self.misses,
+            "releases": self.releases,
+            "leaks": len(self.leaks(leak_age)),
+        }
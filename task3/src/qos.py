@@ -0,0 +1,230 @@
+from collections import deque
+
+DROP_POLICIES = ("tail", "head")
+NUM_PRIORITIES = 8
+
+
+class TrafficClass:
+    """
+    One egress class of a port: a bounded deque plus its own counters.
+    Queue entries are (packet, arrival_time) tuples.
+    """
+    def __init__(self, index, queue_depth=64, drop_policy="tail"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        if queue_depth < 1:
+            raise ValueError("Queue depth must be at least 1")
+        self.index = index
+        self.queue_depth = queue_depth
+        self.drop_policy = drop_policy
+        self.queue = deque()
+        self.enqueued = 0
+        self.transmitted = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, packet, latency):
+        self.transmitted += 1
+        self.bytes_sent += packet.size
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def stats(self, elapsed):
+        return {
+            "enqueued": self.enqueued,
+            "transmitted": self.transmitted,
+            "dropped": self.dropped,
+            "occupancy": len(self.queue),
+            "avg_latency": self.total_latency / self.transmitted if self.transmitted else 0.0,
+            "max_latency": self.max_latency,
+            "throughput_bps": self.bytes_sent * 8 / elapsed if elapsed else 0.0,
+        }
+
+
+class Scheduler:
+    """
+    Base egress scheduler. Packets are classified by their 802.1p priority
+    (PCP) through pcp_map and held in one TrafficClass per class.
+    Subclasses implement _select() to pick the next class to serve, or
+    override dequeue() when serving a class also updates round state.
+    """
+    def __init__(self, num_classes=NUM_PRIORITIES, queue_depth=64, drop_policy="tail", pcp_map=None):
+        if num_classes < 1:
+            raise ValueError("A scheduler needs at least one class")
+        self.classes = [TrafficClass(i, queue_depth, drop_policy) for i in range(num_classes)]
+        if pcp_map is None:
+            # Spread the eight PCP values evenly over the available classes
+            pcp_map = [pcp * num_classes // NUM_PRIORITIES for pcp in range(NUM_PRIORITIES)]
+        self.pcp_map = pcp_map
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def classify(self, packet):
+        return self.pcp_map[packet.priority]
+
+    def enqueue(self, packet, now):
+        cls = self.classes[self.classify(packet)]
+        queue = cls.queue
+        if len(queue) >= cls.queue_depth:
+            cls.dropped += 1
+            if cls.drop_policy == "tail":
+                return False
+            dropped, _ = queue.popleft()
+            if dropped.pooled:
+                dropped.release()
+            self._length -= 1
+        was_empty = not queue
+        queue.append((packet, now))
+        cls.enqueued += 1
+        self._length += 1
+        if was_empty:
+            self._activate(cls.index)
+        return True
+
+    def dequeue(self):
+        """Return (packet, arrival_time, traffic_class) for the next packet to send."""
+        cls = self.classes[self._select()]
+        packet, arrived = cls.queue.popleft()
+        self._length -= 1
+        if not cls.queue:
+            self._deactivate(cls.index)
+        return packet, arrived, cls
+
+    def _activate(self, index):
+        pass
+
+    def _deactivate(self, index):
+        pass
+
+    def _select(self):
+        raise NotImplementedError
+
+
+class StrictPriorityScheduler(Scheduler):
+    """
+    Always serve the highest non-empty class. Active classes are tracked in
+    a bitmask so selection is a single bit_length() call.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._active = 0
+
+    def _activate(self, index):
+        self._active |= 1 << index
+
+    def _deactivate(self, index):
+        self._active &= ~(1 << index)
+
+    def _select(self):
+        return self._active.bit_length() - 1
+
+
+class FifoScheduler(StrictPriorityScheduler):
+    """Single class, first-in first-out; the default for a plain link."""
+    def __init__(self, queue_depth=64, drop_policy="tail"):
+        super().__init__(1, queue_depth, drop_policy)
+
+    def classify(self, packet):
+        return 0
+
+
+class WeightedRoundRobinScheduler(Scheduler):
+    """
+    Round robin over active classes, sending up to weights[i] packets from
+    class i per turn.
+    """
+    def __init__(self, weights, queue_depth=64, drop_policy="tail", pcp_map=None):
+        if any(w < 1 for w in weights):
+            raise ValueError("WRR weights must be positive integers")
+        super().__init__(len(weights), queue_depth, drop_policy, pcp_map)
+        self.weights = list(weights)
+        self._round = deque()
+        self._credit = 0
+
+    def _activate(self, index):
+        self._round.append(index)
+
+    def dequeue(self):
+        index = self._round[0]
+        if self._credit == 0:
+            self._credit = self.weights[index]
+        self._credit -= 1
+        cls = self.classes[index]
+        packet, arrived = cls.queue.popleft()
+        self._length -= 1
+        if not cls.queue:
+            self._round.popleft()
+            self._credit = 0
+        elif self._credit == 0:
+            self._round.rotate(-1)
+        return packet, arrived, cls
+
+
+class DeficitRoundRobinScheduler(Scheduler):
+    """
+    Deficit round robin: each turn a class earns quantums[i] bytes of credit
+    and sends head packets while the credit covers them.
+    """
+    def __init__(self, quantums, queue_depth=64, drop_policy="tail", pcp_map=None):
+        if any(q <= 0 for q in quantums):
+            raise ValueError("DRR quantums must be positive")
+        super().__init__(len(quantums), queue_depth, drop_policy, pcp_map)
+        self.quantums = list(quantums)
+        self.deficits = [0] * len(quantums)
+        self._round = deque()
+        self._fresh = True
+
+    def _activate(self, index):
+        self._round.append(index)
+
+    def dequeue(self):
+        round_ = self._round
+        while True:
+            index = round_[0]
+            cls = self.classes[index]
+            if self._fresh:
+                self.deficits[index] += self.quantums[index]
+                self._fresh = False
+            packet, arrived = cls.queue[0]
+            if packet.size <= self.deficits[index]:
+                break
+            round_.rotate(-1)
+            self._fresh = True
+        cls.queue.popleft()
+        self._length -= 1
+        self.deficits[index] -= packet.size
+        if not cls.queue:
+            # An idle class keeps no credit into its next busy period
+            self.deficits[index] = 0
+            round_.popleft()
+            self._fresh = True
+        return packet, arrived, cls
+
+
+SCHEDULERS = {
+    "fifo": FifoScheduler,
+    "strict": StrictPriorityScheduler,
+    "wrr": WeightedRoundRobinScheduler,
+    "drr": DeficitRoundRobinScheduler,
+}
+
+
+def make_scheduler(kind, weights=None, queue_depth=64, drop_policy="tail"):
+    """
+    Build a scheduler by name. weights are per-class packet weights for
+    "wrr" and byte quantums for "drr"; "strict" uses eight classes.
+    """
+    if kind not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler: {kind}")
+    if kind == "fifo":
+        return FifoScheduler(queue_depth, drop_policy)
+    if kind == "strict":
+        return StrictPriorityScheduler(NUM_PRIORITIES, queue_depth, drop_policy)
+    if weights is None:
+        raise ValueError(f"Scheduler {kind} requires weights")
+    return SCHEDULERS[kind](weights, queue_depth, drop_policy)
@@ -0,0 +1,240 @@
+"""
+Routed networks of Router objects.
+
+RoutedNetwork keeps the router graph and one shortest-path tree per router
+(Dijkstra), and from them installs static routes: every destination
+connected to router D is reachable from router S through the first hop of
+S's tree. When a link changes, only the sources whose tree can be affected
+are updated, and only the part of each tree that can change: a new or
+cheaper link is relaxed outward from its endpoints, a failed or dearer one
+re-settles the subtree that hung below it. Only routes whose next hop
+changed are rewritten.
+Each change is recorded in convergence_log.
+"""
+import time
+from heapq import heappush, heappop
+
+INFINITY = float("inf")
+
+
+class RoutedNetwork:
+    def __init__(self):
+        self.routers = []
+        self.links = {}
+        self.distances = {}
+        self.parents = {}
+        self.next_hops = {}
+        self.installed = {}
+        self.connected = {}
+        self.convergence_log = []
+
+    def add_router(self, router):
+        self.routers.append(router)
+        self.links.setdefault(router, {})
+        self.installed[router] = set()
+        if self.distances:
+            self.connected[router] = router.connected_destinations()
+            self.distances[router] = {router: 0}
+            self.parents[router] = {router: None}
+            self.next_hops[router] = {}
+        return router
+
+    def add_link(self, a, b, cost=1):
+        if cost <= 0:
+            raise ValueError("Link cost must be positive")
+        old = self.links[a].get(b)
+        self.links[a][b] = cost
+        self.links[b][a] = cost
+        if not self.distances:
+            return
+        reason = f"link {a.name}-{b.name} cost {cost}"
+        if old is None or cost < old:
+            affected = [s for s in self.routers
+                        if self.distances[s].get(a, INFINITY) + cost < self.distances[s].get(b, INFINITY)
+                        or self.distances[s].get(b, INFINITY) + cost < self.distances[s].get(a, INFINITY)]
+            self._converge(reason, affected, lambda source: self._improve(source, a, b, cost))
+        elif cost > old:
+            self._converge(reason, self._sources_using(a, b), lambda source: self._worsen(source, a, b))
+
+    def remove_link(self, a, b):
+        del self.links[a][b]
+        del self.links[b][a]
+        if self.distances:
+            self._converge(f"link {a.name}-{b.name} down", self._sources_using(a, b),
+                           lambda source: self._worsen(source, a, b))
+
+    def _sources_using(self, a, b):
+        return [s for s in self.routers
+                if self.parents[s].get(b) is a or self.parents[s].get(a) is b]
+
+    def _shortest_paths(self, source):
+        distances = {source: 0}
+        parents = {source: None}
+        first_hops = {}
+        heap = [(0, 0, source)]
+        order = 1
+        done = set()
+        while heap:
+            dist, _, node = heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for neighbor, cost in self.links[node].items():
+                candidate = dist + cost
+                if candidate < distances.get(neighbor, INFINITY):
+                    distances[neighbor] = candidate
+                    parents[neighbor] = node
+                    first_hops[neighbor] = neighbor if node is source else first_hops[node]
+                    heappush(heap, (candidate, order, neighbor))
+                    order += 1
+        return distances, parents, first_hops
+
+    def _recompute(self, source):
+        previous = self.next_hops.get(source, {})
+        distances, parents, first_hops = self._shortest_paths(source)
+        self.distances[source] = distances
+        self.parents[source] = parents
+        self.next_hops[source] = first_hops
+        return {destination: previous.get(destination) for destination in set(previous) | set(first_hops)}
+
+    def _settle(self, source, heap, previous, allowed=None):
+        # Dijkstra from already-seeded heap entries; only nodes in allowed (if given) are relaxed
+        distances = self.distances[source]
+        parents = self.parents[source]
+        first_hops = self.next_hops[source]
+        order = len(heap)
+        while heap:
+            dist, _, node = heappop(heap)
+            if dist > distances.get(node, INFINITY):
+                continue
+            for neighbor, cost in self.links[node].items():
+                if allowed is not None and neighbor not in allowed:
+                    continue
+                candidate = dist + cost
+                if candidate < distances.get(neighbor, INFINITY):
+                    previous.setdefault(neighbor, first_hops.get(neighbor))
+                    distances[neighbor] = candidate
+                    parents[neighbor] = node
+                    first_hops[neighbor] = neighbor if node is source else first_hops[node]
+                    order += 1
+                    heappush(heap, (candidate, order, neighbor))
+        return previous
+
+    def _improve(self, source, a, b, cost):
+        """
+        Link a-b appeared or became cheaper: relax outward from its endpoints.
+        Only routers whose distance improves are visited.
+        """
+        distances = self.distances[source]
+        parents = self.parents[source]
+        first_hops = self.next_hops[source]
+        previous = {}
+        heap = []
+        for u, v in ((a, b), (b, a)):
+            candidate = distances.get(u, INFINITY) + cost
+            if candidate < distances.get(v, INFINITY):
+                previous.setdefault(v, first_hops.get(v))
+                distances[v] = candidate
+                parents[v] = u
+                first_hops[v] = v if u is source else first_hops[u]
+                heappush(heap, (candidate, len(heap), v))
+        return self._settle(source, heap, previous)
+
+    def _worsen(self, source, a, b):
+        """
+        Link a-b failed or became dearer while on source's tree. Only the
+        subtree below it can get longer paths; it is cut off and re-settled
+        from its neighbours outside the subtree.
+        """
+        distances = self.distances[source]
+        parents = self.parents[source]
+        first_hops = self.next_hops[source]
+        child = b if parents.get(b) is a else a
+        children = {}
+        for node, parent in parents.items():
+            children.setdefault(parent, []).append(node)
+        subtree = {child}
+        stack = [child]
+        while stack:
+            for node in children.get(stack.pop(), ()):
+                subtree.add(node)
+                stack.append(node)
+
+        previous = {}
+        for node in subtree:
+            previous[node] = first_hops.pop(node)
+            del distances[node]
+            del parents[node]
+        heap = []
+        for node in subtree:
+            best, via = INFINITY, None
+            for neighbor, cost in self.links[node].items():
+                if neighbor not in subtree and distances.get(neighbor, INFINITY) + cost < best:
+                    best, via = distances[neighbor] + cost, neighbor
+            if via is not None:
+                distances[node] = best
+                parents[node] = via
+                first_hops[node] = node if via is source else first_hops[via]
+                heappush(heap, (best, len(heap), node))
+        return self._settle(source, heap, previous, allowed=subtree)
+
+    def compute(self):
+        """
+        Full all-pairs computation and route installation. Call again after
+        attaching new hosts so their addresses are advertised.
+        """
+        for router, installed in self.installed.items():
+            for ip in installed:
+                router.route_table.pop(ip, None)
+            installed.clear()
+        self.connected = {router: router.connected_destinations() for router in self.routers}
+        self.distances = {}
+        self.parents = {}
+        self.next_hops = {}
+        self._converge("initial", self.routers, self._recompute)
+
+    def _converge(self, reason, sources, update):
+        start = time.perf_counter()
+        routes_changed = 0
+        for source in sources:
+            previous = update(source)
+            first_hops = self.next_hops[source]
+            for destination, old_hop in previous.items():
+                new_hop = first_hops.get(destination)
+                if old_hop is not new_hop:
+                    routes_changed += self._install(source, destination, new_hop)
+        self.convergence_log.append({
+            "reason": reason,
+            "sources_recomputed": len(sources),
+            "routes_changed": routes_changed,
+            "seconds": time.perf_counter() - start,
+        })
+
+    def _install(self, source, destination, next_hop):
+        changed = 0
+        table = source.route_table
+        installed = self.installed[source]
+        for ip in self.connected[destination]:
+            if ip in table and ip not in installed:
+                # Never shadow the source's own connected routes
+                continue
+            if next_hop is None:
+                if ip in installed:
+                    del table[ip]
+                    installed.discard(ip)
+                    changed += 1
+            else:
+                table[ip] = (next_hop, None)
+                installed.add(ip)
+                changed += 1
+        return changed
+
+    def path(self, source, destination):
+        """Router path from source to destination, or None if unreachable."""
+        parents = self.parents.get(source, {})
+        if destination not in parents:
+            return None
+        hops = [destination]
+        while hops[-1] is not source:
+            hops.append(parents[hops[-1]])
+        return hops[::-1]
@@ -0,0 +1,223 @@
+"""
+Randomized scenario runner.
+
+Each scenario is a plain dict (picklable, so it can cross a process pool):
+    {"seed": int,
+     "ports": number of switch ports,
+     "hosts": [(mac, interface, vlan_id, ip), ...],
+     "lags": {host interface: [member ports], ...},
+     "links": {port: (bandwidth, delay), ...},
+     "compiled": bool (run the switch on a compiled forwarding plan),
+     "traffic": [(src_index, dst_index or None for broadcast, message_id), ...]}
+
+run_scenario() builds a fresh fabric with logging disabled, replays the
+traffic and returns the list of invariant violations. Failing scenarios are
+shrunk to a minimal reproducer with shrink().
+"""
+import argparse
+import io
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+from Sim_LAN1225 import Host, Switch, Router, SwitchFabric
+
+BROADCAST = "FF:FF:FF:FF:FF:FF"
+
+
+def generate_scenario(seed, max_hosts=8, max_vlans=3, max_packets=40):
+    rng = random.Random(seed)
+    n_hosts = rng.randint(2, max_hosts)
+    n_vlans = rng.randint(1, max_vlans)
+    n_ports = rng.randint(n_hosts, 3 * n_hosts)
+    ports = rng.sample(range(n_ports), n_hosts)
+    spare = [port for port in range(n_ports) if port not in ports]
+    hosts = []
+    lags = {}
+    for i, interface in enumerate(ports):
+        vlan_id = 10 * rng.randint(1, n_vlans)
+        hosts.append((f"00:00:00:00:{seed % 256:02X}:{i + 1:02X}", interface, vlan_id, f"10.{vlan_id}.0.{i + 1}"))
+        if spare and rng.random() < 0.2:
+            # The LAG takes the host's interface as its id and first member
+            lags[interface] = [interface] + [spare.pop() for _ in range(min(len(spare), rng.randint(1, 2)))]
+    links = {}
+    if rng.random() < 0.3:
+        for port in range(n_ports):
+            # Queues deep enough that no frame is dropped
+            links[port] = (rng.choice([1e6, 1e7, 1e9]), rng.choice([0.0, 1e-4, 1e-3]))
+    traffic = []
+    for k in range(rng.randint(1, max_packets)):
+        src = rng.randrange(n_hosts)
+        if rng.random() < 0.2:
+            dst = None
+        else:
+            dst = rng.choice([i for i in range(n_hosts) if i != src])
+        traffic.append((src, dst, f"m{k}"))
+    return {"seed": seed, "ports": n_ports, "hosts": hosts, "lags": lags, "links": links,
+            "compiled": rng.random() < 0.5, "traffic": traffic}
+
+
+def build(spec):
+    fabric = SwitchFabric(log_file=None)
+    switch = Switch(fabric, num_interfaces=spec.get("ports", max(8, len(spec["hosts"]))))
+    router = Router()
+    switch.router = router
+    for lag_id, members in spec.get("lags", {}).items():
+        switch.add_lag(lag_id, members)
+    for port, (bandwidth, delay) in spec.get("links", {}).items():
+        fabric.set_link(port, bandwidth=bandwidth, delay=delay, queue_depth=1024)
+    hosts = []
+    for mac, interface, vlan_id, ip in spec["hosts"]:
+        host = Host(mac, interface, vlan_id=vlan_id, ip_address=ip)
+        # Attach without pre-populating the MAC table so learning is exercised
+        switch.interfaces[interface] = host
+        fabric.interfaces[interface] = host
+        lag = switch.lags.get(interface)
+        if lag is not None:
+            for port in lag.members:
+                fabric.interfaces[port] = host
+        router.add_route(ip, None, interface=host)
+        hosts.append(host)
+    if spec.get("compiled"):
+        switch.compile()
+    return fabric, switch, hosts
+
+
+def expected_receivers(spec):
+    """
+    message_id -> set of host indices that must receive it exactly once, or
+    None if delivery is optional. Unicast to a MAC the switch has not learned
+    yet is dropped, so only unicast to a host that has already sent is due.
+    """
+    hosts = spec["hosts"]
+    learned = set()
+    expected = {}
+    for src, dst, message_id in spec["traffic"]:
+        # The switch learns the source before it forwards
+        learned.add(src)
+        if dst is None:
+            expected[message_id] = {i for i, host in enumerate(hosts) if i != src and host[2] == hosts[src][2]}
+        elif dst in learned:
+            expected[message_id] = {dst}
+        else:
+            expected[message_id] = None
+    return expected
+
+
+def check_invariants(spec, switch, hosts):
+    violations = []
+    messages = {message_id: (src, dst) for src, dst, message_id in spec["traffic"]}
+    received = {message_id: set() for message_id in messages}
+
+    for index, host in enumerate(hosts):
+        seen = set()
+        for packet in host.buffer:
+            message_id = packet.payload
+            if message_id in seen:
+                violations.append(f"duplicate delivery of {message_id} to host {index}")
+            seen.add(message_id)
+            received[message_id].add(index)
+            src, dst = messages[message_id]
+            if dst is None:
+                if hosts[src].vlan_id != host.vlan_id:
+                    violations.append(f"broadcast {message_id} from VLAN {hosts[src].vlan_id} "
+                                      f"leaked to host {index} in VLAN {host.vlan_id}")
+                if src == index:
+                    violations.append(f"broadcast {message_id} echoed back to its sender")
+            elif dst != index:
+                violations.append(f"unicast {message_id} for host {dst} delivered to host {index}")
+
+    for message_id, due in expected_receivers(spec).items():
+        if due is None:
+            continue
+        for index in sorted(due - received[message_id]):
+            kind = "broadcast" if messages[message_id][1] is None else "unicast"
+            violations.append(f"{kind} {message_id} never reached host {index}")
+
+    by_mac = {host.mac: host for host in hosts}
+    for mac, interface in switch.mac_table.items():
+        if by_mac[mac].interface != interface:
+            violations.append(f"MAC {mac} learned on interface {interface}, host is on {by_mac[mac].interface}")
+    return violations
+
+
+def run_scenario(spec):
+    fabric, switch, hosts = build(spec)
+    with redirect_stdout(io.StringIO()):
+        for src, dst, message_id in spec["traffic"]:
+            sender = hosts[src]
+            if dst is None:
+                sender.send_packet(BROADCAST, message_id, switch, "255.255.255.255")
+            else:
+                sender.send_packet(hosts[dst].mac, message_id, switch, hosts[dst].ip_address)
+        fabric.run()
+    return check_invariants(spec, switch, hosts)
+
+
+def _without_host(spec, index):
+    hosts = [h for i, h in enumerate(spec["hosts"]) if i != index]
+    interface = spec["hosts"][index][1]
+    lags = {lag_id: members for lag_id, members in spec.get("lags", {}).items() if lag_id != interface}
+    remap = {old: new for new, old in enumerate(i for i in range(len(spec["hosts"])) if i != index)}
+    traffic = [(remap[src], None if dst is None else remap[dst], message_id)
+               for src, dst, message_id in spec["traffic"]
+               if src != index and dst != index]
+    return dict(spec, hosts=hosts, lags=lags, traffic=traffic)
+
+
+def shrink(spec, run=run_scenario):
+    """
+    Greedily remove traffic (in halving chunks, ddmin style) and then unused
+    hosts while run(spec) still reports a violation.
+    """
+    if not run(spec):
+        return spec
+    chunk = max(1, len(spec["traffic"]) // 2)
+    while chunk >= 1:
+        i = 0
+        while i < len(spec["traffic"]):
+            candidate = dict(spec, traffic=spec["traffic"][:i] + spec["traffic"][i + chunk:])
+            if candidate["traffic"] and run(candidate):
+                spec = candidate
+            else:
+                i += chunk
+        chunk //= 2
+
+    index = len(spec["hosts"]) - 1
+    while index >= 0 and len(spec["hosts"]) > 2:
+        candidate = _without_host(spec, index)
+        if candidate["traffic"] and run(candidate):
+            spec = candidate
+        index -= 1
+    return spec
+
+
+def run_many(count, seed=0, procs=None, chunksize=16):
+    """Run count seeded scenarios across a process pool; return [(spec, violations)] for failures."""
+    specs = [generate_scenario(seed + i) for i in range(count)]
+    if procs == 1:
+        results = list(map(run_scenario, specs))
+    else:
+        with ProcessPoolExecutor(max_workers=procs) as pool:
+            results = list(pool.map(run_scenario, specs, chunksize=chunksize))
+    return [(spec, violations) for spec, violations in zip(specs, results) if violations]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded random Sim-LAN scenarios and check invariants")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--procs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    failures = run_many(args.count, args.seed, args.procs)
+    print(f"{args.count - len(failures)}/{args.count} scenarios passed")
+    for spec, violations in failures[:5]:
+        minimal = shrink(spec)
+        print(f"\nSeed {spec['seed']} failed: {violations[0]}")
+        print(f"Minimal reproducer: {minimal}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,290 @@
+"""
+simlan: command-line simulation runner.
+
+    python simlan.py --hosts 32 --vlans 2 --packets 20000 --bandwidth 1e9
+    python simlan.py --topology lab.json --traffic bulk.json --duration 0.5 --no-log
+    python simlan.py --packets 5000 --replicas 4 --procs 4
+    python simlan.py --packets 5000 --profile cprofile
+
+Topology JSON:
+    {"interfaces": 64,
+     "hosts": [{"mac": "00:00:00:00:00:01", "interface": 0, "vlan": 10,
+                "ip": "10.10.0.1", "priority": 0}, ...],
+     "link": {"bandwidth": 1e9, "delay": 1e-6, "queue_depth": 64,
+              "scheduler": "fifo", "weights": null}}
+Traffic JSON:
+    {"rate_pps": 100000, "size": 512, "broadcast_fraction": 0.0, "seed": 0}
+
+NumPy (latency percentiles), cProfile and the process pool are only imported
+when a run needs them, so `simlan --help` and small runs start quickly.
+"""
+import argparse
+import io
+import json
+import random
+import sys
+import time
+from contextlib import nullcontext, redirect_stdout
+
+from Sim_LAN1225 import Host, Switch, Router, FixedSwitchFabric, Packet
+
+BROADCAST = "FF:FF:FF:FF:FF:FF"
+
+
+class MeasuredHost(Host):
+    """
+    Host that records delivery latency instead of buffering every frame.
+    The payload carries the send time, so copies made by flood_packet keep it.
+    """
+    def __init__(self, *args, clock=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.clock = clock
+        self.latencies = []
+        self.received_bytes = 0
+
+    def receive_packet(self, packet):
+        if (packet.dst == self.mac or packet.dst == BROADCAST) and packet.vlan_id == self.vlan_id:
+            self.latencies.append(self.clock.now - packet.payload)
+            self.received_bytes += packet.size
+
+
+def default_topology(n_hosts, n_vlans):
+    hosts = []
+    for i in range(n_hosts):
+        vlan_id = 10 * (1 + i % n_vlans)
+        hosts.append({"mac": f"00:00:00:00:{i // 256:02X}:{i % 256:02X}", "interface": i,
+                      "vlan": vlan_id, "ip": f"10.{vlan_id}.{i // 256}.{i % 256}"})
+    return {"interfaces": n_hosts, "hosts": hosts, "link": None}
+
+
+def build(topology, log_file):
+    from qos import make_scheduler
+
+    fabric = FixedSwitchFabric(log_file=log_file)
+    switch = Switch(fabric, num_interfaces=topology.get("interfaces", len(topology["hosts"])))
+    switch.router = Router()
+    hosts = []
+    for spec in topology["hosts"]:
+        host = MeasuredHost(spec["mac"], spec["interface"], vlan_id=spec.get("vlan", 1),
+                            ip_address=spec.get("ip", "0.0.0.0"), priority=spec.get("priority", 0),
+                            clock=fabric.clock)
+        fabric.connect_host_to_switch(host, switch)
+        switch.router.add_route(host.ip_address, None, interface=host)
+        hosts.append(host)
+    link = topology.get("link")
+    if link:
+        for host in hosts:
+            scheduler = make_scheduler(link.get("scheduler", "fifo"), link.get("weights"),
+                                       link.get("queue_depth", 64), link.get("drop_policy", "tail"))
+            fabric.set_link(host.interface, bandwidth=link.get("bandwidth", 1e9), delay=link.get("delay", 0.0),
+                            scheduler=scheduler)
+    return fabric, switch, hosts
+
+
+def simulate(topology, traffic, packets=None, duration=None, log_file=None, seed=0, quiet=True):
+    """
+    Run one replica and return its raw counters and latency samples.
+    quiet swallows the switch's per-packet prints; a caller running replicas
+    on threads passes False and redirects stdout once for all of them.
+    """
+    fabric, switch, hosts = build(topology, log_file)
+    clock = fabric.clock
+    rng = random.Random(traffic.get("seed", 0) + seed)
+    rate = traffic.get("rate_pps", 100000)
+    size = traffic.get("size", 512)
+    broadcast_fraction = traffic.get("broadcast_fraction", 0.0)
+    sent = [0, 0]
+
+    def send_next():
+        if packets is not None and sent[0] >= packets:
+            return
+        if duration is not None and clock.now > duration:
+            return
+        src, dst = rng.sample(hosts, 2)
+        if rng.random() < broadcast_fraction:
+            dst_mac, dst_ip = BROADCAST, "255.255.255.255"
+        else:
+            dst_mac, dst_ip = dst.mac, dst.ip_address
+        packet = Packet(src.mac, dst_mac, src.ip_address, dst_ip, clock.now, vlan_id=src.vlan_id,
+                        priority=src.priority, size=size)
+        switch.handle_packet(packet, src.interface)
+        sent[0] += 1
+        sent[1] += size
+        clock.schedule(rng.expovariate(rate), send_next)
+
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()) if quiet else nullcontext():
+        clock.schedule(0.0, send_next)
+        clock.run(duration)
+    wall = time.perf_counter() - start
+
+    latencies = [latency for host in hosts for latency in host.latencies]
+    return {
+        "sent": sent[0],
+        "sent_bytes": sent[1],
+        "delivered": len(latencies),
+        "delivered_bytes": sum(host.received_bytes for host in hosts),
+        "dropped": sum(stats["dropped"] for stats in fabric.port_stats().values()),
+        "sim_time": clock.now,
+        "wall_time": wall,
+        "latencies": latencies,
+    }
+
+
+def _simulate_args(args, quiet=True):
+    return simulate(*args, quiet=quiet)
+
+
+def run_replicas(topology, traffic, packets, duration, log_file, replicas, threads=None, procs=None):
+    jobs = []
+    for i in range(replicas):
+        replica_log = log_file if log_file is None or replicas == 1 else f"{log_file}.{i}"
+        jobs.append((topology, traffic, packets, duration, replica_log, i))
+    if replicas == 1 or not (threads or procs):
+        return [_simulate_args(job) for job in jobs]
+    if procs:
+        from concurrent.futures import ProcessPoolExecutor
+        # Each worker process has its own sys.stdout to redirect
+        with ProcessPoolExecutor(max_workers=procs) as pool:
+            return list(pool.map(_simulate_args, jobs))
+    from concurrent.futures import ThreadPoolExecutor
+    # redirect_stdout swaps the process-wide sys.stdout, so it is entered once around all threads
+    with redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(_simulate_args, jobs, [False] * len(jobs)))
+
+
+def percentiles(samples, points=(50, 99)):
+    if not samples:
+        return {p: 0.0 for p in points}
+    try:
+        import numpy
+    except ImportError:
+        ordered = sorted(samples)
+        return {p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+    values = numpy.percentile(numpy.asarray(samples), points)
+    return dict(zip(points, (float(v) for v in values)))
+
+
+def summarize(results):
+    sent = sum(r["sent"] for r in results)
+    delivered = sum(r["delivered"] for r in results)
+    sim_time = max(r["sim_time"] for r in results) or 1e-12
+    wall = sum(r["wall_time"] for r in results)
+    latencies = [latency for r in results for latency in r["latencies"]]
+    pct = percentiles(latencies)
+    lines = [
+        f"replicas:        {len(results)}",
+        f"packets sent:    {sent}",
+        f"delivered:       {delivered} (includes broadcast copies)",
+        f"dropped:         {sum(r['dropped'] for r in results)}",
+        f"simulated time:  {sim_time:.6f} s",
+        f"throughput:      {delivered / sim_time / len(results):.0f} pkt/s, "
+        f"{sum(r['delivered_bytes'] for r in results) * 8 / sim_time / len(results) / 1e6:.2f} Mbit/s per replica",
+    ]
+    if latencies:
+        lines.append(f"latency:         mean {sum(latencies) / len(latencies) * 1e6:.2f} us, "
+                     f"p50 {pct[50] * 1e6:.2f} us, p99 {pct[99] * 1e6:.2f} us, max {max(latencies) * 1e6:.2f} us")
+    lines.append(f"wall time:       {wall:.3f} s ({sent / wall if wall else 0:.0f} packets simulated per second)")
+    return "\n".join(lines)
+
+
+class Sampler:
+    """Statistical profiler: samples the running Python stack on SIGPROF."""
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.counts = {}
+
+    def _sample(self, signum, frame):
+        if frame is not None:
+            key = f"{frame.f_code.co_filename}:{frame.f_lineno} ({frame.f_code.co_name})"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def __enter__(self):
+        import signal
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc):
+        import signal
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def report(self, limit=20):
+        total = sum(self.counts.values()) or 1
+        lines = [f"{'samples':>8} {'%':>6}  location"]
+        for key, count in sorted(self.counts.items(), key=lambda item: -item[1])[:limit]:
+            lines.append(f"{count:>8} {100 * count / total:>5.1f}%  {key}")
+        return "\n".join(lines)
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="simlan", description="Run a Sim-LAN simulation and summarize it")
+    parser.add_argument("--topology", help="topology JSON file (default: generated star)")
+    parser.add_argument("--traffic", help="traffic profile JSON file")
+    parser.add_argument("--hosts", type=int, default=16, help="hosts in the generated topology")
+    parser.add_argument("--vlans", type=int, default=1, help="VLANs in the generated topology")
+    parser.add_argument("--bandwidth", type=float, help="add links of this many bit/s to every port")
+    parser.add_argument("--delay", type=float, default=0.0, help="link propagation delay in seconds")
+    parser.add_argument("--rate", type=float, help="offered load in packets per simulated second")
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("--packets", type=int, help="stop after sending N packets")
+    limit.add_argument("--duration", type=float, help="stop after T simulated seconds")
+    parser.add_argument("--replicas", type=int, default=1, help="independent runs with different seeds")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--threads", type=int, help="run replicas on a thread pool")
+    mode.add_argument("--procs", type=int, help="run replicas on a process pool")
+    parser.add_argument("--log", default="fabric_log.txt", help="fabric log file")
+    parser.add_argument("--no-log", action="store_true", help="disable fabric logging")
+    parser.add_argument("--profile", choices=("cprofile", "sample"), help="profile the run")
+    parser.add_argument("--profile-out", help="write cProfile stats to this file")
+    args = parser.parse_args(argv)
+    if args.packets is None and args.duration is None:
+        args.packets = 10000
+    if args.profile and args.procs:
+        parser.error("--profile cannot follow work into --procs workers")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    topology = load_json(args.topology) if args.topology else default_topology(args.hosts, args.vlans)
+    if args.bandwidth:
+        topology["link"] = dict(topology.get("link") or {}, bandwidth=args.bandwidth, delay=args.delay)
+    traffic = load_json(args.traffic) if args.traffic else {}
+    if args.rate:
+        traffic["rate_pps"] = args.rate
+    log_file = None if args.no_log else args.log
+
+    def run():
+        return run_replicas(topology, traffic, args.packets, args.duration, log_file,
+                            args.replicas, args.threads, args.procs)
+
+    if args.profile == "cprofile":
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        results = profiler.runcall(run)
+        if args.profile_out:
+            profiler.dump_stats(args.profile_out)
+        print(summarize(results))
+        print()
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(20)
+    elif args.profile == "sample":
+        with Sampler() as sampler:
+            results = run()
+        print(summarize(results))
+        print()
+        print(sampler.report())
+    else:
+        print(summarize(run()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+"""
+Storm control: per-port token buckets for broadcast, unknown-unicast and
+multicast traffic.
+
+Buckets hold no timers. Each one remembers when it was last refilled and
+tops itself up from the simulated clock the next time a packet asks for a
+token, so a port that stays idle costs nothing.
+"""
+TRAFFIC_KINDS = ("broadcast", "unknown_unicast", "multicast")
+
+
+class TokenBucket:
+    """
+    Parameters:
+    - rate: tokens per second (packets per second)
+    - burst: bucket depth; defaults to one second worth of tokens
+    """
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        if self.burst < 1:
+            raise ValueError("Token bucket burst must allow at least one packet")
+        self.tokens = self.burst
+        self.updated = 0.0
+
+    def take(self, now, cost=1):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class StormControl:
+    """
+    Rate limits for one switch port. Each of broadcast, unknown_unicast and
+    multicast is a packets-per-second rate (or a TokenBucket); None leaves
+    that kind unlimited. If storm_drops packets are dropped within window
+    seconds the port is shut down for shutdown_time seconds and every frame
+    arriving on it meanwhile is discarded. storm_drops=None never shuts the
+    port down.
+    """
+    def __init__(self, broadcast=None, unknown_unicast=None, multicast=None,
+                 storm_drops=None, window=1.0, shutdown_time=5.0):
+        self.buckets = {}
+        for kind, limit in zip(TRAFFIC_KINDS, (broadcast, unknown_unicast, multicast)):
+            if limit is not None:
+                self.buckets[kind] = limit if isinstance(limit, TokenBucket) else TokenBucket(limit)
+        self.storm_drops = storm_drops
+        self.window = window
+        self.shutdown_time = shutdown_time
+        self.drops = {kind: 0 for kind in TRAFFIC_KINDS}
+        self.shutdown_drops = 0
+        self.shutdowns = 0
+        self.down_until = None
+        self.storm_detected = False
+        self._window_start = 0.0
+        self._window_drops = 0
+
+    def is_down(self, now):
+        if self.down_until is None:
+            return False
+        if now >= self.down_until:
+            self.down_until = None
+            return False
+        return True
+
+    def admit(self, kind, now):
+        """
+        Return True if a frame of this kind may enter the switch. Sets
+        storm_detected when the drop makes the port go down.
+        """
+        self.storm_detected = False
+        if self.down_until is not None and self.is_down(now):
+            self.shutdown_drops += 1
+            return False
+        bucket = self.buckets.get(kind)
+        if bucket is None or bucket.take(now):
+            return True
+        self.drops[kind] += 1
+        if self.storm_drops is not None:
+            if now - self._window_start > self.window:
+                self._window_start = now
+                self._window_drops = 0
+            self._window_drops += 1
+            if self._window_drops >= self.storm_drops:
+                self.down_until = now + self.shutdown_time
+                self.shutdowns += 1
+                self._window_drops = 0
+                self.storm_detected = True
+        return False
+
+    def stats(self):
+        return {
+            "drops": dict(self.drops),
+            "shutdown_drops": self.shutdown_drops,
+            "shutdowns": self.shutdowns,
+            "down_until": self.down_until,
+        }
@@ -0,0 +1,108 @@
+import random
+
+import acl as acl_module
+from Sim_LAN1225 import Packet
+from acl import Acl, AclRule, ip_to_int
+from perf_harness import count_calls
+from lan_fixtures import build_lan
+
+
+def random_rule(rng):
+    fields = {}
+    if rng.random() < 0.3:
+        fields["src_ip"] = f"10.{rng.randrange(4)}.{rng.randrange(4)}.0/{rng.choice([8, 16, 24])}"
+    if rng.random() < 0.5:
+        fields["dst_ip"] = f"10.{rng.randrange(4)}.{rng.randrange(4)}.{rng.randrange(8)}/{rng.choice([16, 24, 32])}"
+    if rng.random() < 0.2:
+        fields["src_mac"] = f"00:00:00:00:00:{rng.randrange(16):02X}"
+    if rng.random() < 0.3:
+        low = rng.choice([10, 20, 30])
+        fields["vlan"] = low if rng.random() < 0.5 else (low, low + rng.choice([0, 10, 20]))
+    if rng.random() < 0.2:
+        fields["priority"] = (rng.randrange(4), rng.randrange(4, 8))
+    if rng.random() < 0.1:
+        fields["payload_class"] = rng.choice(["str", "int"])
+    return AclRule(rng.choice(["permit", "deny"]), **fields)
+
+
+def random_packet(rng):
+    return Packet(f"00:00:00:00:00:{rng.randrange(16):02X}", f"00:00:00:00:00:{rng.randrange(16):02X}",
+                  f"10.{rng.randrange(4)}.{rng.randrange(4)}.{rng.randrange(8)}",
+                  f"10.{rng.randrange(4)}.{rng.randrange(4)}.{rng.randrange(8)}",
+                  rng.choice(["data", 7]), vlan_id=rng.choice([10, 20, 30, 40]), priority=rng.randrange(8))
+
+
+def test_compiled_lookup_matches_linear_scan():
+    rng = random.Random(34)
+    acl = Acl([random_rule(rng) for _ in range(500)], default="deny")
+    for _ in range(5000):
+        packet = random_packet(rng)
+        assert acl.lookup(packet) is acl.lookup_linear(packet)
+    print("✓ Compiled ACL Differential Test Passed")
+
+
+def test_first_match_hit_counters_and_recompile():
+    acl = Acl([
+        AclRule("deny", src_ip="10.0.0.0/8", vlan=(10, 19)),
+        AclRule("permit", src_ip="10.1.0.0/16"),
+    ], default="deny")
+    packet = Packet("00:00:00:00:00:01", "00:00:00:00:00:02", "10.1.2.3", "10.9.9.9", "x", vlan_id=12)
+    assert not acl.permits(packet)
+    packet.vlan_id = 20
+    assert acl.permits(packet)
+    assert [hits for _, hits in acl.counters()] == [1, 1, 0]
+
+    acl.insert(0, AclRule("deny", dst_ip="10.9.9.9"))
+    assert not acl.permits(packet), "Inserted rule ignored; ACL was not recompiled"
+    assert acl.compilations == 2
+    print("✓ ACL Ordering and Counter Test Passed")
+
+
+def test_switch_and_router_acls():
+    fabric, switch, (host1, host2, host3) = build_lan(3, vlans=(10, 20))
+    switch.router.add_route(host2.ip_address, None, interface=host2)
+
+    switch.set_acl(2, Acl([AclRule("deny", src_mac=host1.mac)]), direction="egress")
+    host1.send_packet(host3.mac, "blocked", switch, host3.ip_address)
+    assert host3.buffer == [], "Egress ACL did not block the frame"
+
+    switch.router.set_acl(10, Acl([AclRule("deny", dst_ip="192.168.20.0/24", payload_class="str")]))
+    host1.send_packet(host2.mac, "blocked", switch, host2.ip_address)
+    assert host2.buffer == [], "Router ingress ACL did not block the frame"
+    host1.send_packet(host2.mac, 42, switch, host2.ip_address)
+    assert [p.payload for p in host2.buffer] == [42]
+
+    switch.set_acl(0, Acl(default="deny"))
+    host1.send_packet(host2.mac, 43, switch, host2.ip_address)
+    assert len(host2.buffer) == 1, "Ingress ACL did not block the frame"
+    print("✓ Switch and Router ACL Test Passed")
+
+
+def test_ip_cache_is_bounded():
+    assert ip_to_int("10.1.2.3") == 0x0A010203 and ip_to_int("not an ip") == -1
+    for i in range(3 * acl_module.IP_CACHE_SIZE // 2):
+        ip_to_int(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}")
+    assert len(acl_module._ip_cache) <= acl_module.IP_CACHE_SIZE
+    assert ip_to_int("10.1.2.3") == 0x0A010203
+    print("✓ IP Cache Bound Test Passed")
+
+
+def test_lookup_cost_with_thousands_of_rules():
+    rng = random.Random(4)
+    rules = [AclRule("deny", src_ip=f"172.{i // 256}.{i % 256}.0/24", dst_ip=f"10.{i % 4}.0.0/16")
+             for i in range(5000)]
+    acl = Acl(rules + [AclRule("permit", vlan=(10, 20))], default="deny")
+    packets = [random_packet(rng) for _ in range(500)]
+
+    compiled = count_calls(lambda: [acl.lookup(packet) for packet in packets])
+    linear = count_calls(lambda: [acl.lookup_linear(packet) for packet in packets])
+    assert compiled * 10 < linear, f"Compiled lookup made {compiled} calls vs {linear} linear"
+    print("✓ ACL Lookup Cost Test Passed")
+
+
+if __name__ == "__main__":
+    test_compiled_lookup_matches_linear_scan()
+    test_first_match_hit_counters_and_recompile()
+    test_switch_and_router_acls()
+    test_ip_cache_is_bounded()
+    test_lookup_cost_with_thousands_of_rules()
@@ -0,0 +1,140 @@
+import ast
+import csv
+import os
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+
+from analytics import CountMinSketch, TrafficAnalytics
+from perf_harness import count_calls
+from lan_fixtures import build_lan
+
+
+def read_npy(path):
+    with open(path, "rb") as f:
+        assert f.read(8) == b"\x93NUMPY\x01\x00"
+        (length,) = struct.unpack("<H", f.read(2))
+        header = ast.literal_eval(f.read(length).decode("latin1"))
+        rows, cols = header["shape"]
+        values = struct.unpack(f"<{rows * cols}q", f.read())
+    return [list(values[r * cols:(r + 1) * cols]) for r in range(rows)]
+
+
+def test_matrix_vlan_volumes_and_talkers():
+    fabric, switch, hosts = build_lan(8, vlans=(10, 20))
+    analytics = fabric.add_tap(TrafficAnalytics(fabric.clock))
+    rng = random.Random(38)
+    expected = {}
+    for _ in range(500):
+        a = rng.choice(hosts)
+        b = rng.choice([h for h in hosts if h.vlan_id == a.vlan_id and h is not a])
+        a.send_packet(b.mac, "x" * rng.randrange(100), switch, b.ip_address)
+        expected[(a.mac, b.mac)] = expected.get((a.mac, b.mac), 0) + b.buffer[-1].size
+
+    snapshot = analytics.snapshot()
+    assert snapshot.frames == 500 and snapshot.bytes == sum(expected.values())
+    assert snapshot.pair_bytes == expected
+    rows = [list(row) for row in snapshot.matrix()]
+    index = {mac: i for i, mac in enumerate(snapshot.hosts)}
+    assert all(rows[index[s]][index[d]] == v for (s, d), v in expected.items())
+    assert sum(map(sum, rows)) == snapshot.bytes
+    assert set(snapshot.vlan_frames) == {10, 20} and sum(snapshot.vlan_bytes.values()) == snapshot.bytes
+
+    sent = {}
+    for (src, _), value in expected.items():
+        sent[src] = sent.get(src, 0) + value
+    assert snapshot.top_talkers(3) == sorted(sent.items(), key=lambda item: (-item[1], item[0]))[:3]
+    print("✓ Traffic Matrix Test Passed")
+
+
+def test_windows_and_export():
+    fabric, switch, hosts = build_lan(4, vlans=(10,))
+    analytics = fabric.add_tap(TrafficAnalytics(fabric.clock, window=1.0, keep=2))
+    for second in range(4):
+        fabric.clock.run(until=second + 0.5)
+        for _ in range(second + 1):
+            hosts[0].send_packet(hosts[1].mac, "x", switch, hosts[1].ip_address)
+    assert [w.frames for w in analytics.windows] == [2, 3], "Only the last two windows are kept"
+    assert [(w.start, w.end) for w in analytics.windows] == [(1.0, 2.0), (2.0, 3.0)]
+    assert analytics.snapshot().frames == 4
+
+    fabric.clock.run(until=7.5)
+    hosts[1].send_packet(hosts[2].mac, "x", switch, hosts[2].ip_address)
+    assert analytics.windows[-1].frames == 4 and analytics.start == 7.0
+
+    snapshot = analytics.windows[-1]
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot.save_npy(os.path.join(tmp, "matrix.npy"), metric="frames")
+        snapshot.save_csv(os.path.join(tmp, "matrix.csv"), metric="frames")
+        matrix = read_npy(os.path.join(tmp, "matrix.npy"))
+        with open(os.path.join(tmp, "matrix.csv"), newline="") as f:
+            table = list(csv.reader(f))
+    assert matrix == [[0, 4], [0, 0]]
+    assert table == [["src\\dst", hosts[0].mac, hosts[1].mac], [hosts[0].mac, "0", "4"], [hosts[1].mac, "0", "0"]]
+    print("✓ Windowed Snapshot and Export Test Passed")
+
+
+def test_sketches_find_heavy_hitters():
+    sketch = CountMinSketch(width=512, depth=4)
+    rng = random.Random(5)
+    truth = {}
+    for _ in range(20000):
+        key = f"00:00:00:00:{rng.randrange(4000):04X}"
+        truth[key] = truth.get(key, 0) + 1
+        sketch.add(key)
+    assert all(sketch.estimate(k) >= v for k, v in truth.items())
+    assert sum(sketch.estimate(k) - v for k, v in truth.items()) / len(truth) < 2.72 * 20000 / 512
+
+    # Cells must not depend on the per-process str hash seed
+    script = "from analytics import CountMinSketch; print(CountMinSketch()._cells(('AA:1', 'BB:2')))"
+    cells = {subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env={**os.environ, "PYTHONHASHSEED": seed}).stdout for seed in ("1", "2")}
+    assert cells == {f"{CountMinSketch()._cells(('AA:1', 'BB:2'))}\n"}, cells
+
+    analytics = TrafficAnalytics(sketch=True, top_k=5, width=1024)
+
+    class Frame:
+        def __init__(self, src, dst, size):
+            self.src, self.dst, self.size, self.vlan_id = src, dst, size, 10
+
+    heavy = [f"AA:{i}" for i in range(5)]
+    for _ in range(30000):
+        src = rng.choice(heavy) if rng.random() < 0.3 else f"BB:{rng.randrange(5000)}"
+        analytics.observe(Frame(src, "CC:0", 100), 0)
+    snapshot = analytics.snapshot()
+    assert sorted(key for key, _ in snapshot.top_talkers()) == heavy
+    assert analytics.estimate_pair(heavy[0], "CC:0") >= 100 * 1500
+    print("✓ Count-Min Top Talkers Test Passed")
+
+
+def test_tap_overhead():
+    def cost(tap):
+        fabric, switch, hosts = build_lan(32, vlans=(10, 20))
+        if tap:
+            fabric.add_tap(TrafficAnalytics(fabric.clock, window=0.001))
+        rng = random.Random(1)
+        pairs = []
+        while len(pairs) < 3000:
+            a, b = rng.sample(hosts, 2)
+            if a.vlan_id == b.vlan_id:
+                pairs.append((a, b))
+
+        def send():
+            for a, b in pairs:
+                a.send_packet(b.mac, "x", switch, b.ip_address)
+        return count_calls(send)
+
+    base = cost(False)
+    tapped = cost(True)
+    assert tapped < base * 1.5, f"Tap made forwarding {tapped / base:.2f}x the calls"
+    print("✓ Analytics Overhead Test Passed")
+
+
+if __name__ == "__main__":
+    test_matrix_vlan_volumes_and_talkers()
+    test_windows_and_export()
+    test_sketches_find_heavy_hitters()
+    test_tap_overhead()
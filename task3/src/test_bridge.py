@@ -0,0 +1,94 @@
+import random
+
+from Sim_LAN1225 import Host
+from lib_final import Bus, Packet
+from link import SimClock
+from bridge import LearningBridge
+
+
+def send(segment_of, src, dst_mac, payload):
+    segment_of[src.mac].broadcast(Packet(src.mac, dst_mac, src.ip_address, "0.0.0.0", payload, size=500))
+
+
+def build_segments(n_segments, hosts_per_segment, clock=None):
+    segments = [Bus(log_file=None, clock=clock) for _ in range(n_segments)]
+    segment_of = {}
+    hosts = []
+    for s, segment in enumerate(segments):
+        for i in range(hosts_per_segment):
+            host = Host(f"00:00:00:00:{s:02X}:{i:02X}", i)
+            segment.connect_host(host)
+            segment_of[host.mac] = segment
+            hosts.append(host)
+    return segments, segment_of, hosts
+
+
+def test_bridge_learns_filters_and_forwards():
+    segments, segment_of, hosts = build_segments(3, 2)
+    bridge = LearningBridge(segments)
+    a1, a2, b1, b2, c1, c2 = hosts
+
+    # Unknown destination: flooded to the other segments
+    send(segment_of, a1, b1.mac, "first")
+    assert [p.payload for p in b1.buffer] == ["first"]
+    assert segments[2].frames == 1 and bridge.flooded == 1
+
+    # b1 is now known on segment 1 and a1 on segment 0: forward to one segment only
+    send(segment_of, b1, a1.mac, "reply")
+    assert [p.payload for p in a1.buffer] == ["reply"]
+    assert segments[2].frames == 1, "Known unicast leaked to an unrelated segment"
+
+    # Local traffic stays local once both ends are known
+    send(segment_of, a2, a1.mac, "local")
+    assert bridge.filtered == 1
+    assert segments[1].frames == 2
+
+    send(segment_of, c1, "FF:FF:FF:FF:FF:FF", "broadcast")
+    assert all(host.buffer[-1].payload == "broadcast" for host in (a1, a2, b1, b2, c2))
+    assert bridge.segment_of(c1.mac) == 2
+    print("✓ Learning Bridge Test Passed")
+
+
+def offered_load(n_segments, hosts_per_segment, frames=4000, locality=0.9, seed=35):
+    clock = SimClock()
+    segments, segment_of, hosts = build_segments(n_segments, hosts_per_segment, clock)
+    if n_segments > 1:
+        LearningBridge(segments)
+    rng = random.Random(seed)
+    by_segment = [hosts[s * hosts_per_segment:(s + 1) * hosts_per_segment] for s in range(n_segments)]
+    for k in range(frames):
+        s = rng.randrange(n_segments)
+        src = rng.choice(by_segment[s])
+        if rng.random() < locality:
+            dst = rng.choice([h for h in by_segment[s] if h is not src])
+        else:
+            dst = rng.choice([h for h in hosts if h is not src])
+        send(segment_of, src, dst.mac, k)
+        clock.run(until=clock.now + 200e-6)
+    horizon = max(max(seg.busy_until for seg in segments), clock.now)
+    delivered = sum(len(h.buffer) for h in hosts)
+    return {
+        "delivered": delivered,
+        "deliveries": sum(seg.deliveries for seg in segments),
+        "collisions": sum(seg.collisions for seg in segments),
+        "throughput": delivered * 500 * 8 / horizon,
+    }
+
+
+def test_segmenting_improves_throughput_and_cost():
+    # 32 hosts offering 20 Mbit/s to one 10 Mbit/s bus vs four bridged segments
+    shared = offered_load(1, 32)
+    segmented = offered_load(4, 8)
+    # Learning floods a few frames early on; after that every frame reaches one host
+    assert shared["delivered"] == 4000 and 4000 <= segmented["delivered"] < 4100
+    assert segmented["deliveries"] * 2 < shared["deliveries"], "Segmenting did not cut per-frame cost"
+    assert segmented["collisions"] < shared["collisions"]
+    # The shared bus saturates at 10 Mbit/s; the bridged LAN carries the whole offered load
+    assert shared["throughput"] <= 10e6 * 1.001
+    assert segmented["throughput"] > 1.9 * shared["throughput"]
+    print("✓ Segmented Throughput Test Passed")
+
+
+if __name__ == "__main__":
+    test_bridge_learns_filters_and_forwards()
+    test_segmenting_improves_throughput_and_cost()
@@ -0,0 +1,164 @@
+import io
+import random
+from contextlib import redirect_stdout
+
+from Sim_LAN1225 import Host, Switch, Router, FixedSwitchFabric, Packet
+from acl import Acl, AclRule
+from multicast import group_mac_for_ip
+from storm import StormControl, TokenBucket
+from pool import PacketPool
+from perf_harness import count_calls
+from lan_fixtures import build_lan
+
+BROADCAST = "FF:FF:FF:FF:FF:FF"
+GROUPS = [group_mac_for_ip(f"239.1.1.{i}") for i in range(3)]
+
+
+def build_world(seed, compiled, logging=True):
+    rng = random.Random(seed)
+    log = io.StringIO() if logging else None
+    lag = rng.random() < 0.5
+    pool = PacketPool(32) if rng.random() < 0.3 else None
+    fabric, switch, hosts = build_lan(14, vlans=[rng.choice([10, 20]) for _ in range(14)], log_file=log, pool=pool)
+    for host in hosts:
+        switch.router.add_route(host.ip_address, None, interface=host)
+    if lag:
+        switch.add_lag(14, [14, 15])
+        uplink = Host("00:00:00:00:00:FE", 14, vlan_id=10, ip_address="192.168.10.254")
+        fabric.connect_host_to_switch(uplink, switch)
+        hosts.append(uplink)
+    if compiled:
+        switch.compile()
+    for host in rng.sample(hosts, 4):
+        host.join_group(rng.choice(GROUPS), switch)
+    if rng.random() < 0.5:
+        switch.set_acl(rng.randrange(14), Acl([AclRule("deny", dst_mac=rng.choice(hosts).mac)]))
+    if rng.random() < 0.5:
+        switch.set_acl(rng.randrange(14), Acl([AclRule("deny", src_ip="192.168.10.0/29")]), direction="egress")
+    if rng.random() < 0.5:
+        switch.set_storm_control(rng.randrange(14), StormControl(broadcast=TokenBucket(10, burst=5), storm_drops=10))
+    if rng.random() < 0.3:
+        fabric.set_link(rng.randrange(14), bandwidth=1e6, queue_depth=4)
+    return fabric, switch, hosts, log
+
+
+def drive(world, seed, steps=300):
+    fabric, switch, hosts, log = world
+    rng = random.Random(seed)
+    out = io.StringIO()
+    with redirect_stdout(out):
+        for k in range(steps):
+            if k == steps // 4:
+                # Entries added in place, bypassing the Switch methods
+                switch.ingress_acls[2] = Acl(default="deny")
+                switch.egress_acls[3] = Acl([AclRule("deny", vlan=10)])
+                switch.storm_control[4] = StormControl(broadcast=1)
+            if k == steps // 2:
+                # Reconfigure mid-run: a compiled switch must rebuild its plan
+                switch.router = Router()
+                for host in hosts[::2]:
+                    switch.router.add_route(host.ip_address, None, interface=host)
+                switch.set_acl(0, Acl([AclRule("deny", vlan=20)]))
+                switch.set_storm_control(1, StormControl(unknown_unicast=3))
+            src = rng.choice(hosts)
+            dst = rng.choice(hosts)
+            roll = rng.random()
+            if roll < 0.5:
+                src.send_packet(dst.mac, k, switch, dst.ip_address)
+            elif roll < 0.7:
+                src.send_packet(BROADCAST, k, switch, "255.255.255.255")
+            elif roll < 0.85:
+                src.send_packet(rng.choice(GROUPS), k, switch, "239.1.1.1")
+            elif roll < 0.93:
+                # Addresses behind a port that are learned from their first frame
+                src.send_packet(f"00:00:00:00:AA:{rng.randrange(4):02X}", k, switch, "10.9.9.9")
+            else:
+                switch.handle_packet(Packet(f"00:00:00:00:AA:{rng.randrange(4):02X}", dst.mac, "10.9.9.9",
+                                            dst.ip_address, k, vlan_id=src.vlan_id), src.interface)
+        fabric.run()
+    return {
+        "buffers": [[(str(p), p.ttl) for p in host.buffer] for host in hosts],
+        "stdout": out.getvalue(),
+        "log": log.getvalue() if log is not None else None,
+        "mac_table": dict(switch.mac_table),
+        "storm": {port: control.stats() for port, control in switch.storm_control.items()},
+        "acls": [acl.counters() for acl in list(switch.ingress_acls.values()) + list(switch.egress_acls.values())],
+        "ports": fabric.port_stats(),
+        "pool": switch.pool.stats() if switch.pool is not None else None,
+    }
+
+
+def test_plan_matches_interpreted_path():
+    for seed in range(40):
+        logging = seed % 4 != 0
+        interpreted = drive(build_world(seed, compiled=False, logging=logging), seed)
+        compiled = drive(build_world(seed, compiled=True, logging=logging), seed)
+        for key in interpreted:
+            assert compiled[key] == interpreted[key], f"seed {seed}: {key} differs"
+    print("✓ Forwarding Plan Differential Test Passed")
+
+
+def test_plan_follows_configuration_changes():
+    fabric, switch, hosts = build_lan(3, compiled=True)
+    plan = switch.handle_packet
+    # Tables filled in place after compiling are enforced without a rebuild
+    switch.ingress_acls[0] = Acl(default="deny")
+    switch.storm_control[1] = StormControl(broadcast=1)
+    with redirect_stdout(io.StringIO()):
+        hosts[0].send_packet(hosts[2].mac, "denied", switch, hosts[2].ip_address)
+        for k in range(5):
+            hosts[1].send_packet(BROADCAST, k, switch, "255.255.255.255")
+    assert switch.handle_packet is plan
+    assert [p.payload for p in hosts[2].buffer] == [0], "In-place ACL or storm control bypassed"
+    switch.set_acl(0, None)
+    switch.set_storm_control(1, None)
+
+    # Links added to the fabric after compiling are honoured without a rebuild
+    fabric.set_link(1, bandwidth=1e6, delay=0.01)
+    with redirect_stdout(io.StringIO()):
+        hosts[0].send_packet(hosts[1].mac, "queued", switch, hosts[1].ip_address)
+    assert hosts[1].buffer == []
+    fabric.run()
+    assert [p.payload for p in hosts[1].buffer] == ["queued"]
+
+    switch.decompile()
+    assert "handle_packet" not in switch.__dict__
+    print("✓ Forwarding Plan Rebuild Test Passed")
+
+
+def test_overridden_handle_packet_is_not_compiled():
+    class MirroringSwitch(Switch):
+        def handle_packet(self, packet, input_interface):
+            self.mirrored = packet.payload
+            super().handle_packet(packet, input_interface)
+
+    switch = MirroringSwitch(FixedSwitchFabric(log_file=None))
+    try:
+        switch.compile()
+        assert False, "compile() discarded a handle_packet override"
+    except TypeError:
+        pass
+    assert not switch.compiled and "handle_packet" not in switch.__dict__
+    print("✓ Forwarding Plan Override Test Passed")
+
+
+def test_plan_speedup():
+    def flood_cost(compiled):
+        _, switch, hosts = build_lan(48, compiled=compiled)
+
+        def flood():
+            for k in range(300):
+                hosts[k % 48].send_packet(BROADCAST, k, switch, "255.255.255.255")
+        return count_calls(flood)
+
+    interpreted = flood_cost(False)
+    compiled = flood_cost(True)
+    assert compiled * 1.5 < interpreted, f"Compiled plan made {compiled} calls vs {interpreted} interpreted"
+    print("✓ Forwarding Plan Speedup Test Passed")
+
+
+if __name__ == "__main__":
+    test_plan_matches_interpreted_path()
+    test_plan_follows_configuration_changes()
+    test_overridden_handle_packet_is_not_compiled()
+    test_plan_speedup()
@@ -0,0 +1,104 @@
+from Sim_LAN1225 import Host, Router, Packet
+from lag import HashGroup, flow_hash
+from lan_fixtures import build_lan
+
+
+def flows(n):
+    return [Packet(f"00:00:00:00:{i // 256:02X}:{i % 256:02X}", "00:00:00:00:FF:01",
+                   f"10.0.{i // 256}.{i % 256}", "10.1.0.1", "data") for i in range(n)]
+
+
+def test_flow_hash_is_deterministic():
+    a, b = flows(2)
+    assert flow_hash(a) == flow_hash(Packet(a.src, a.dst, a.src_ip, a.dst_ip, "other payload"))
+    assert flow_hash(a) != flow_hash(b)
+    print("✓ Flow Hash Test Passed")
+
+
+def test_lag_spreads_flows_and_rebalances_minimally():
+    # The server is connected after its LAG exists, so it is not one of build_lan's hosts
+    fabric, switch, _ = build_lan(0)
+    switch.add_lag("lag1", [4, 5, 6, 7])
+    server = Host("00:00:00:00:FF:01", "lag1", vlan_id=10, ip_address="10.1.0.1")
+    fabric.connect_host_to_switch(server, switch)
+
+    packets = flows(2000)
+    for packet in packets:
+        packet.vlan_id = 10
+        switch.handle_packet(packet, 0)
+    lag = switch.lags["lag1"]
+    counts = [lag.counts[port] for port in lag.members]
+    assert len(server.buffer) == 2000
+    assert min(counts) > 400, f"Load is not spread evenly: {counts}"
+
+    before = {id(p): lag.select(p) for p in packets}
+    switch.set_port_state(5, up=False)
+    after = {id(p): lag.select(p) for p in packets}
+    moved = [k for k in before if before[k] != after[k]]
+    assert all(before[k] == 5 for k in moved), "Flows on healthy ports were moved"
+    assert 5 not in after.values()
+
+    switch.set_port_state(5, up=True)
+    restored = {id(p): lag.select(p) for p in packets}
+    assert sum(1 for k in restored if restored[k] == 5) > 400
+    print("✓ LAG Test Passed")
+
+
+def test_lag_added_after_host_connects():
+    fabric, switch, hosts = build_lan(5)
+    server = hosts[4]
+    switch.add_lag(4, [4, 5, 6, 7])
+    packets = flows(40)
+    for packet in packets:
+        packet.dst, packet.vlan_id = server.mac, 10
+        switch.handle_packet(packet, 0)
+    assert len(server.buffer) == 40, "Frames hashed to member ports were lost"
+    assert all(switch.lags[4].counts[port] for port in (4, 5, 6, 7))
+
+    switch.set_port_state(5, up=False)
+    assert 5 not in fabric.interfaces
+    switch.set_port_state(5, up=True)
+    assert fabric.interfaces[5] is server
+    switch.remove_lag(4)
+    assert [port for port in (5, 6, 7) if port in fabric.interfaces] == []
+    assert fabric.interfaces[4] is server
+    print("✓ LAG After Host Test Passed")
+
+
+def test_ecmp_route():
+    router = Router()
+    uplinks = [Host(f"00:00:00:00:01:0{i}", i, vlan_id=100 + i) for i in range(3)]
+    router.add_ecmp_route("10.1.0.1", [(f"10.255.0.{i}", host) for i, host in enumerate(uplinks)])
+
+    for packet in flows(900):
+        packet.dst = "FF:FF:FF:FF:FF:FF"
+        router.route_packet(packet, 1)
+    received = [len(host.buffer) for host in uplinks]
+    assert sum(received) == 900
+    assert min(received) > 200, f"ECMP paths unevenly loaded: {received}"
+
+    group = router.route_table["10.1.0.1"]
+    for path in list(group.members):
+        group.fail(path)
+    assert group.select(flows(1)[0]) is None
+    print("✓ ECMP Route Test Passed")
+
+
+def test_hash_group_all_members_restored():
+    group = HashGroup(["a", "b"], buckets=8)
+    group.fail("a")
+    group.fail("b")
+    assert set(group.table) == {None}
+    group.restore("b")
+    assert set(group.table) == {"b"}
+    group.restore("a")
+    assert group.table.count("a") == 4 and group.table.count("b") == 4
+    print("✓ Hash Group Restore Test Passed")
+
+
+if __name__ == "__main__":
+    test_flow_hash_is_deterministic()
+    test_lag_spreads_flows_and_rebalances_minimally()
+    test_lag_added_after_host_connects()
+    test_ecmp_route()
+    test_hash_group_all_members_restored()
@@ -0,0 +1,90 @@
+from Sim_LAN1225 import Packet
+from lan_fixtures import build_lan
+
+
+def test_serialization_and_propagation_delay():
+    fabric, switch, (host1, host2, _) = build_lan()
+    # 1000-byte frames on a 1 Mbps link take 8 ms to serialize
+    fabric.set_link(1, bandwidth=1e6, delay=0.002)
+    for i in range(3):
+        packet = Packet(host1.mac, host2.mac, host1.ip_address, host2.ip_address, f"p{i}", vlan_id=10, size=1000)
+        switch.handle_packet(packet, host1.interface)
+
+    assert host2.buffer == [], "Packets delivered before the clock advanced"
+    fabric.run(until=0.0101)
+    assert len(host2.buffer) == 1, "First packet should arrive after 8 ms + 2 ms"
+    fabric.run()
+    assert [p.payload for p in host2.buffer] == ["p0", "p1", "p2"]
+    assert abs(fabric.clock.now - 0.026) < 1e-9
+
+    stats = fabric.port_stats()[1]
+    assert stats["transmitted"] == 3 and stats["dropped"] == 0
+    # Second packet waits 8 ms and third 16 ms behind the head of line
+    assert abs(stats["avg_queue_delay"] - 0.008) < 1e-9
+    print("✓ Serialization and Propagation Delay Test Passed")
+
+
+def test_egress_queue_drop_policies():
+    for policy, expected in (("tail", ["p0", "p1", "p2"]), ("head", ["p0", "p3", "p4"])):
+        fabric, switch, (host1, host2, _) = build_lan()
+        fabric.set_link(1, bandwidth=1e6, queue_depth=2, drop_policy=policy)
+        for i in range(5):
+            packet = Packet(host1.mac, host2.mac, host1.ip_address, host2.ip_address, f"p{i}", vlan_id=10, size=1000)
+            switch.handle_packet(packet, host1.interface)
+        fabric.run()
+
+        stats = fabric.port_stats()[1]
+        assert [p.payload for p in host2.buffer] == expected, f"Wrong survivors for {policy} drop"
+        assert stats["dropped"] == 2
+        assert stats["max_occupancy"] == 2
+    print("✓ Egress Queue Drop Policy Test Passed")
+
+
+def test_unconfigured_ports_deliver_immediately():
+    fabric, switch, (host1, host2, host3) = build_lan()
+    fabric.set_link(2, bandwidth=1e6)
+    host1.send_packet(host2.mac, "Hello", switch, host2.ip_address)
+    assert len(host2.buffer) == 1, "Port without a link model should deliver synchronously"
+    print("✓ Unconfigured Port Test Passed")
+
+
+def test_routed_traffic_uses_links():
+    fabric, switch, (host1, host2, _) = build_lan()
+    host2.vlan_id = switch.vlan_table[host2.mac] = 20
+    switch.router.add_route(host2.ip_address, None, interface=host2)
+    fabric.set_link(1, bandwidth=1e6, queue_depth=2)
+    for i in range(4):
+        packet = Packet(host1.mac, host2.mac, host1.ip_address, host2.ip_address, f"r{i}", vlan_id=10, size=1000)
+        switch.handle_packet(packet, host1.interface)
+
+    assert host2.buffer == [], "Routed packets bypassed the link model"
+    fabric.run()
+    assert [p.payload for p in host2.buffer] == ["r0", "r1", "r2"]
+    stats = fabric.port_stats()[1]
+    assert stats["transmitted"] == 3 and stats["dropped"] == 1
+    print("✓ Routed Traffic Link Test Passed")
+
+
+def test_router_shared_by_two_fabrics():
+    fabric, switch, (host1, _, _) = build_lan()
+    other_fabric, other_switch, (_, remote, _) = build_lan()
+    remote.vlan_id = other_switch.vlan_table[remote.mac] = 20
+    other_switch.router = switch.router
+    switch.router.add_route(remote.ip_address, None, interface=remote)
+    packet = Packet(host1.mac, remote.mac, host1.ip_address, remote.ip_address, "across", vlan_id=10)
+    switch.router.route_packet(packet, 10)
+    assert [p.payload for p in remote.buffer] == ["across"], "Frame sent to a port of the wrong fabric"
+    assert fabric.interfaces[1].buffer == []
+
+    # Routers without a fabric attribute, or no router at all, can still be assigned
+    other_switch.router = None
+    other_switch.router = type("StubRouter", (), {"route_packet": lambda self, packet, vlan_id: None})()
+    print("✓ Shared Router Test Passed")
+
+
+if __name__ == "__main__":
+    test_serialization_and_propagation_delay()
+    test_egress_queue_drop_policies()
+    test_unconfigured_ports_deliver_immediately()
+    test_routed_traffic_uses_links()
+    test_router_shared_by_two_fabrics()
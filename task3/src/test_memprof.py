@@ -0,0 +1,85 @@
+import io
+from contextlib import redirect_stdout
+
+from Sim_LAN1225 import Host, Packet
+from memprof import MemoryProfiler, soak, unit_costs, format_diff
+from acl import Acl, AclRule
+from analytics import TrafficAnalytics
+from storm import StormControl
+from lan_fixtures import build_lan
+from simlan import MeasuredHost
+
+
+def test_flooded_copies_count_as_packets():
+    with MemoryProfiler() as profiler:
+        _, switch, hosts = build_lan(32)
+        before = profiler.snapshot("connected")
+        broadcast = Packet(hosts[0].mac, "FF:FF:FF:FF:FF:FF", "0.0.0.0", "255.255.255.255", "b", vlan_id=10)
+        for _ in range(20):
+            switch.flood_packet(broadcast, 0)
+        after = profiler.snapshot("flooded")
+
+    diff = after.diff(before)
+    assert diff["packets"][1] >= 20 * 31, "Per-recipient copies were not attributed to packets"
+    assert diff["packets"][0] > diff["switch_tables"][0]
+    assert profiler.peak >= after.total()
+    print("✓ Flood Copy Attribution Test Passed")
+
+
+def test_soak_reports_unit_costs_and_growth():
+    profiler, snapshots, hosts, switches = soak(n_hosts=16, rounds=2, packets_per_round=200)
+    first, last = snapshots[1], snapshots[-1]
+    costs = unit_costs(last, hosts, switches)
+    assert costs["bytes_per_packet"] > 0 and costs["bytes_per_host"] > 0 and costs["bytes_per_mac_entry"] > 0
+
+    growth = last.diff(first)
+    # Buffered packets and the in-memory log keep growing; the MAC table does not
+    assert growth["packets"][0] > 0 and growth["logger"][0] > 0
+    assert growth["switch_tables"][0] == 0
+    assert "packets" in format_diff(growth)
+    print("✓ Soak Memory Report Test Passed")
+
+
+def test_new_modules_get_their_own_subsystems():
+    fabric, switch, hosts = build_lan(16, compiled=True)
+    with MemoryProfiler() as profiler:
+        before = profiler.snapshot("compiled")
+        fabric.add_tap(TrafficAnalytics(fabric.clock))
+        switch.set_acl(0, Acl([AclRule("deny", dst_ip=f"10.9.{i}.0/24") for i in range(100)]))
+        switch.set_storm_control(1, StormControl(broadcast=1000))
+        with redirect_stdout(io.StringIO()):
+            for k in range(50):
+                hosts[k % 16].send_packet("FF:FF:FF:FF:FF:FF", k, switch, "255.255.255.255")
+        after = profiler.snapshot("configured")
+
+    diff = after.diff(before)
+    assert diff["acl"][0] > 0 and diff["analytics"][0] > 0 and diff["storm"][0] > 0
+    # Copies made by the compiled plan's inline flood loop are still packets
+    assert diff["packets"][1] >= 2 * 50 * 15, diff
+    assert "analytics" in format_diff(diff)
+    print("✓ Module Subsystem Test Passed")
+
+
+def test_host_subclasses_count_as_hosts():
+    class TracingHost(Host):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.trace = [bytearray(64) for _ in range(50)]
+
+    with MemoryProfiler() as profiler:
+        before = profiler.snapshot("empty")
+        hosts = [TracingHost(f"00:00:00:00:00:{i:02X}", i) for i in range(10)]
+        hosts += [MeasuredHost(f"00:00:00:00:01:{i:02X}", i) for i in range(10)]
+        after = profiler.snapshot("hosts")
+
+    diff = after.diff(before)
+    assert diff["hosts"][1] >= 10 * 50 + 10, diff
+    assert "test_memprof" not in diff and "simlan" not in diff
+    print("✓ Host Subclass Attribution Test Passed")
+
+
+if __name__ == "__main__":
+    test_flooded_copies_count_as_packets()
+    test_soak_reports_unit_costs_and_growth()
+    test_new_modules_get_their_own_subsystems()
+    test_host_subclasses_count_as_hosts()
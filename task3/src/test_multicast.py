@@ -0,0 +1,72 @@
+import io
+
+from lan_fixtures import build_lan
+from multicast import group_mac_for_ip, is_multicast
+
+
+def test_group_address_mapping():
+    assert group_mac_for_ip("239.1.2.3") == "01:00:5E:01:02:03"
+    assert group_mac_for_ip("224.129.0.1") == "01:00:5E:01:00:01"
+    assert is_multicast("01:00:5E:01:02:03")
+    assert not is_multicast("00:00:00:00:00:01")
+    print("✓ Group Address Mapping Test Passed")
+
+
+def test_group_traffic_reaches_only_subscribers():
+    fabric, switch, (h1, h2, h3, h4, h5) = build_lan(5, vlans=(10, 10, 10, 20, 20))
+    group = group_mac_for_ip("239.1.1.1")
+    h2.join_group(group, switch)
+    # Same group MAC joined from another VLAN must stay isolated
+    h5.join_group(group, switch)
+
+    h1.send_packet(group, "stream", switch, "239.1.1.1")
+    assert [p.payload for p in h2.buffer] == ["stream"]
+    assert h3.buffer == [], "Non-member received group traffic"
+    assert h5.buffer == [], "Group traffic leaked into another VLAN"
+    assert sorted(switch.multicast.members(10, group, fabric.clock.now)) == [1]
+
+    # Group MACs are case-insensitive, as the switch treats them
+    h1.send_packet(group.lower(), "lower", switch, "239.1.1.1")
+    assert [p.payload for p in h2.buffer] == ["stream", "lower"]
+
+    h2.leave_group(group, switch)
+    h1.send_packet(group, "after leave", switch, "239.1.1.1")
+    assert len(h2.buffer) == 2, "Host still received traffic after leaving"
+    print("✓ Multicast Snooping Test Passed")
+
+
+def test_membership_timeout():
+    fabric, switch, (h1, h2, h3, _, _) = build_lan(5, vlans=(10, 10, 10, 20, 20))
+    switch.multicast.membership_timeout = 10.0
+    group = group_mac_for_ip("239.2.2.2")
+    h2.join_group(group, switch)
+    fabric.run(until=5.0)
+    h3.join_group(group, switch)
+    fabric.run(until=12.0)
+
+    h1.send_packet(group, "late", switch, "239.2.2.2")
+    assert h2.buffer == [], "Expired member still received traffic"
+    assert [p.payload for p in h3.buffer] == ["late"]
+    print("✓ Membership Timeout Test Passed")
+
+
+def test_memberships_persist_without_timeout():
+    log = io.StringIO()
+    fabric, switch, (h1, h2, h3, _, _) = build_lan(5, vlans=(10, 10, 10, 20, 20), log_file=log)
+    group = group_mac_for_ip("239.3.3.3")
+    h1.join_group(group, switch)
+    h2.join_group(group, switch)
+    fabric.run(until=1000.0)
+
+    h1.send_packet(group, "hourly", switch, "239.3.3.3")
+    assert [p.payload for p in h2.buffer] == ["hourly"], "Membership expired without a timeout configured"
+    assert h1.buffer == [], "Group traffic echoed back to its sender"
+    assert "sent to 1 subscriber port(s)" in log.getvalue()
+    print("✓ Membership Persistence Test Passed")
+
+
+if __name__ == "__main__":
+    test_group_address_mapping()
+    test_group_traffic_reaches_only_subscribers()
+    test_membership_timeout()
+    test_memberships_persist_without_timeout()
@@ -0,0 +1,42 @@
+import json
+
+from perf_harness import WORKLOADS, baseline_path, compare, format_rows, is_stale, measure
+
+
+def test_compare_flags_regressions():
+    baseline = {"relative_ops": 1000.0, "blocks_per_op": 10.0, "peak_bytes_per_op": 500.0}
+    faster = dict(baseline, relative_ops=1100.0)
+    rows, regressed = compare("switch.unicast", baseline, faster)
+    assert not regressed
+
+    slower = dict(baseline, relative_ops=300.0, blocks_per_op=30.0)
+    rows, regressed = compare("switch.unicast", baseline, slower)
+    assert regressed
+    report = format_rows(rows)
+    assert "relative_ops" in report and "-70.0%" in report
+    assert report.count("REGRESSION") == 2
+    print("✓ Baseline Comparison Test Passed")
+
+
+def test_every_workload_has_a_baseline():
+    for name in WORKLOADS:
+        with open(baseline_path(name)) as f:
+            baseline = json.load(f)
+        assert {"relative_ops", "blocks_per_op", "peak_bytes_per_op"} <= set(baseline)
+        assert not is_stale(name, baseline), \
+            f"{name} benchmarks changed code: run perf_harness.py --only {name} with --update or --justify"
+    print("✓ Baseline Files Test Passed")
+
+
+def test_measure_is_stable_in_allocations():
+    first = measure("router.route", repeats=3)
+    second = measure("router.route", repeats=3)
+    assert abs(first["peak_bytes_per_op"] - second["peak_bytes_per_op"]) <= 0.05 * first["peak_bytes_per_op"] + 1
+    assert first["relative_ops"] > 0
+    print("✓ Workload Measurement Test Passed")
+
+
+if __name__ == "__main__":
+    test_compare_flags_regressions()
+    test_every_workload_has_a_baseline()
+    test_measure_is_stable_in_allocations()
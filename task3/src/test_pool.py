@@ -0,0 +1,158 @@
+import gc
+import multiprocessing
+import tracemalloc
+
+from lib_final import Packet
+from pool import PacketPool, PacketArena
+from lan_fixtures import build_lan
+
+BROADCAST = "FF:FF:FF:FF:FF:FF"
+
+
+def test_acquire_release_and_stats():
+    pool = PacketPool(2)
+    a = pool.acquire("00:00:00:00:00:01", "00:00:00:00:00:02", "10.0.0.1", "10.0.0.2", "x", vlan_id=10)
+    b = pool.acquire("00:00:00:00:00:01", "00:00:00:00:00:02", "10.0.0.1", "10.0.0.2", "y", priority=5)
+    c = pool.acquire("00:00:00:00:00:01", "00:00:00:00:00:02", "10.0.0.1", "10.0.0.2", "z")
+    assert (a.size, b.priority, c.slot) == (64, 5, 2)
+    assert pool.stats()["capacity"] == 3 and pool.misses == 1
+
+    b.retain()
+    b.release()
+    assert pool.in_use() == 3, "Frame freed while still referenced"
+    for packet in (a, b, c):
+        packet.release()
+    assert pool.in_use() == 0 and pool.releases == 3
+    try:
+        a.release()
+        assert False, "Double release not detected"
+    except ValueError:
+        pass
+
+    d = pool.acquire("00:00:00:00:00:01", "00:00:00:00:00:02", "10.0.0.1", "10.0.0.2", "again")
+    assert d is c and d.payload == "again", "Free list should hand back the most recently freed slot"
+    assert abs(pool.hit_rate() - 3 / 4) < 1e-9
+
+    fixed = PacketPool(1, grow=False)
+    fixed.acquire("00:00:00:00:00:01", "00:00:00:00:00:02", "10.0.0.1", "10.0.0.2", "x")
+    overflow = fixed.acquire("00:00:00:00:00:01", "00:00:00:00:00:02", "10.0.0.1", "10.0.0.2", "x")
+    assert type(overflow) is Packet and not overflow.pooled
+    print("✓ Packet Pool Test Passed")
+
+
+def test_sustained_run_recycles_every_frame():
+    for compiled in (False, True):
+        pool = PacketPool(256)
+        fabric, switch, hosts = build_lan(16, pool=pool, compiled=compiled)
+        # Two hosts behind rate-limited links with head drop, so frames wait in queues and some are dropped
+        fabric.set_link(3, bandwidth=1e6, queue_depth=4, drop_policy="head")
+        fabric.set_link(4, bandwidth=1e6, queue_depth=4)
+        received = [0]
+
+        def count(packet):
+            received[0] += 1
+
+        for k in range(4000):
+            sender = hosts[k % 16]
+            if k % 3:
+                sender.send_packet(hosts[(k * 7) % 16].mac, k, switch, "10.0.0.1")
+            else:
+                sender.send_packet(BROADCAST, k, switch, "255.255.255.255")
+            if k % 50 == 49:
+                fabric.run(until=fabric.clock.now + 1e-3)
+                for host in hosts:
+                    host.consume(count)
+        fabric.run()
+        for host in hosts:
+            host.consume(count)
+
+        stats = pool.stats()
+        assert received[0] > 4000
+        assert stats["in_use"] == 0 and stats["leaks"] == 0, stats
+        assert stats["hit_rate"] > 0.99 and stats["capacity"] < 1024
+        assert sum(port["dropped"] for port in fabric.port_stats().values()) > 0
+    print("✓ Sustained Pool Recycling Test Passed")
+
+
+def test_leaks_reported_for_unconsumed_frames():
+    pool = PacketPool(64)
+    fabric, switch, hosts = build_lan(4, pool=pool)
+    for k in range(30):
+        hosts[0].send_packet(hosts[1].mac, k, switch, "10.0.0.2")
+        hosts[0].send_packet(hosts[2].mac, k, switch, "10.0.0.3")
+        hosts[2].consume()
+    leaks = pool.leaks(min_age=10)
+    assert len(pool.leaks()) == 30 and len(leaks) == 25
+    assert all(packet.dst == hosts[1].mac for packet in leaks)
+    assert leaks[0].payload == 0, "Oldest leak should come first"
+    print("✓ Pool Leak Detection Test Passed")
+
+
+def test_pool_avoids_allocation_and_gc():
+    def churn(pool):
+        _, switch, hosts = build_lan(32, pool=pool)
+        for k in range(200):
+            hosts[k % 32].send_packet(BROADCAST, k, switch, "255.255.255.255")
+        for host in hosts:
+            host.consume()
+        gc.collect()
+        collections = gc.get_stats()[0]["collections"]
+        tracemalloc.start()
+        for k in range(2000):
+            hosts[k % 32].send_packet(BROADCAST, k, switch, "255.255.255.255")
+            if k % 64 == 63:
+                for host in hosts:
+                    host.consume()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak, gc.get_stats()[0]["collections"] - collections
+
+    # Frames wait up to 64 sends in host buffers: the heap version keeps allocating new ones
+    heap_peak, heap_collections = churn(None)
+    pooled_peak, pooled_collections = churn(PacketPool(2048))
+    assert pooled_peak * 3 < heap_peak, f"{pooled_peak} vs {heap_peak} bytes at peak"
+    assert pooled_collections * 5 < heap_collections, f"{pooled_collections} vs {heap_collections} collections"
+    print("✓ Pool Allocation Test Passed")
+
+
+def read_headers(name, capacity, slots, results):
+    arena = PacketArena.attach(name, capacity)
+    results.put([arena.header(slot) for slot in slots])
+    arena.close()
+
+
+def test_shared_arena_visible_from_another_process():
+    arena = PacketArena(8, shared=True)
+    try:
+        pool = PacketPool(8, arena=arena)
+        packet = pool.acquire("00:00:00:00:00:0a", "FF:FF:FF:FF:FF:FF", "10.0.0.1", "10.0.0.255", "x",
+                              vlan_id=20, priority=3, size=300)
+        packet.ttl -= 1
+        freed = pool.acquire("00:00:00:00:00:01", "00:00:00:00:00:02", "10.0.0.1", "10.0.0.2", "y")
+        freed.release()
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        reader = context.Process(target=read_headers, args=(arena.name, 8, [packet.slot, freed.slot], results))
+        reader.start()
+        headers = results.get(timeout=60)
+        reader.join()
+        assert headers[0] == {"src": "00:00:00:00:00:0A", "dst": "FF:FF:FF:FF:FF:FF", "src_ip": "10.0.0.1",
+                              "dst_ip": "10.0.0.255", "vlan_id": 20, "priority": 3, "size": 300, "ttl": 63}
+        assert headers[1] is None, "Free slot reported as in use"
+        assert packet.src == "00:00:00:00:00:0a", "Local reads must keep the original string"
+        assert "ttl" not in vars(packet), "Numeric header fields must live only in the arena"
+        arena.columns["ttl"][packet.slot] = 7
+        assert packet.ttl == 7
+    finally:
+        arena.close()
+        arena.unlink()
+    print("✓ Shared Packet Arena Test Passed")
+
+
+if __name__ == "__main__":
+    test_acquire_release_and_stats()
+    test_sustained_run_recycles_every_frame()
+    test_leaks_reported_for_unconsumed_frames()
+    test_pool_avoids_allocation_and_gc()
+    test_shared_arena_visible_from_another_process()
@@ -0,0 +1,78 @@
+from Sim_LAN1225 import Packet
+from lan_fixtures import build_lan
+from qos import (StrictPriorityScheduler, WeightedRoundRobinScheduler,
+                 DeficitRoundRobinScheduler, make_scheduler)
+
+
+def packet(payload, priority=0, size=1000):
+    return Packet("00:00:00:00:00:01", "00:00:00:00:00:02", "192.168.10.1", "192.168.10.2",
+                  payload, vlan_id=10, priority=priority, size=size)
+
+
+def drain(scheduler):
+    order = []
+    while len(scheduler):
+        order.append(scheduler.dequeue()[0].payload)
+    return order
+
+
+def test_strict_priority_protects_voice_vlan():
+    fabric, switch, (bulk, server, voice) = build_lan(3)
+    voice.priority = 5
+    fabric.set_link(1, bandwidth=1e7, scheduler=make_scheduler("strict", queue_depth=200))
+    try:
+        fabric.set_link(2, queue_depth=200, scheduler=make_scheduler("strict"))
+        assert False, "Queue depth given next to a scheduler was accepted"
+    except ValueError:
+        pass
+
+    # Bulk traffic saturates the port before the voice frames show up
+    for i in range(100):
+        bulk.send_packet(server.mac, "x" * 1400, switch, server.ip_address)
+    for i in range(5):
+        voice.send_packet(server.mac, f"voice{i}", switch, server.ip_address)
+    fabric.run()
+
+    assert len(server.buffer) == 105
+    classes = fabric.port_stats()[1]["classes"]
+    assert classes[5]["transmitted"] == 5 and classes[0]["transmitted"] == 100
+    assert classes[5]["max_latency"] < 0.01, "Voice frames waited behind bulk traffic"
+    assert classes[0]["avg_latency"] > classes[5]["avg_latency"] * 10
+    print("✓ Strict Priority Test Passed")
+
+
+def test_weighted_round_robin_shares():
+    scheduler = WeightedRoundRobinScheduler([1, 3], pcp_map=[0, 0, 0, 0, 1, 1, 1, 1])
+    for i in range(4):
+        scheduler.enqueue(packet(f"lo{i}", priority=0), 0.0)
+    for i in range(6):
+        scheduler.enqueue(packet(f"hi{i}", priority=7), 0.0)
+    assert drain(scheduler) == ["lo0", "hi0", "hi1", "hi2", "lo1", "hi3", "hi4", "hi5", "lo2", "lo3"]
+    print("✓ Weighted Round Robin Test Passed")
+
+
+def test_deficit_round_robin_is_byte_fair():
+    scheduler = DeficitRoundRobinScheduler([1500, 1500], pcp_map=[0, 0, 0, 0, 1, 1, 1, 1])
+    for i in range(4):
+        scheduler.enqueue(packet(f"big{i}", priority=0, size=1500), 0.0)
+    for i in range(12):
+        scheduler.enqueue(packet(f"small{i}", priority=7, size=500), 0.0)
+    order = drain(scheduler)
+    # Each turn moves 1500 bytes: one big frame or three small ones
+    assert order[:8] == ["big0", "small0", "small1", "small2", "big1", "small3", "small4", "small5"]
+    print("✓ Deficit Round Robin Test Passed")
+
+
+def test_strict_priority_ordering():
+    scheduler = StrictPriorityScheduler()
+    for i, priority in enumerate([0, 3, 7, 3, 0]):
+        scheduler.enqueue(packet(f"p{i}", priority=priority), 0.0)
+    assert drain(scheduler) == ["p2", "p1", "p3", "p0", "p4"]
+    print("✓ Strict Priority Ordering Test Passed")
+
+
+if __name__ == "__main__":
+    test_strict_priority_protects_voice_vlan()
+    test_weighted_round_robin_shares()
+    test_deficit_round_robin_is_byte_fair()
+    test_strict_priority_ordering()
@@ -0,0 +1,116 @@
+import random
+
+from Sim_LAN1225 import Host, Router, Packet
+from routing import RoutedNetwork
+from perf_harness import count_calls
+
+
+def build_network(n_routers, edges):
+    network = RoutedNetwork()
+    routers = [network.add_router(Router(f"R{i}")) for i in range(n_routers)]
+    hosts = []
+    for i, router in enumerate(routers):
+        host = Host(f"00:00:00:01:{i // 256:02X}:{i % 256:02X}", 0, vlan_id=10,
+                    ip_address=f"10.{i // 256}.{i % 256}.1")
+        router.add_route(host.ip_address, None, interface=host)
+        hosts.append(host)
+    for a, b, cost in edges:
+        network.add_link(routers[a], routers[b], cost)
+    network.compute()
+    return network, routers, hosts
+
+
+def send(router, host, payload="x", ttl=64):
+    packet = Packet("00:00:00:00:00:01", host.mac, "10.255.0.1", host.ip_address, payload, vlan_id=10, ttl=ttl)
+    router.route_packet(packet, 10)
+    return packet
+
+
+def random_topology(n, extra, rng):
+    edges = [(i, rng.randrange(i), rng.randint(1, 10)) for i in range(1, n)]
+    edges += [(rng.randrange(n), rng.randrange(n), rng.randint(1, 10)) for _ in range(extra)]
+    return [(a, b, cost) for a, b, cost in edges if a != b]
+
+
+def test_multi_hop_forwarding_and_ttl():
+    network, routers, hosts = build_network(4, [(0, 1, 1), (1, 2, 1), (2, 3, 1)])
+    packet = send(routers[0], hosts[3], "far")
+    assert [p.payload for p in hosts[3].buffer] == ["far"]
+    assert packet.ttl == 61
+    assert [r.name for r in network.path(routers[0], routers[3])] == ["R0", "R1", "R2", "R3"]
+
+    send(routers[0], hosts[3], "short-lived", ttl=2)
+    assert len(hosts[3].buffer) == 1, "Packet outlived its TTL"
+    assert routers[1].ttl_expired == 1
+    print("✓ Multi-hop Routing and TTL Test Passed")
+
+
+def test_link_failure_reroutes_and_partitions():
+    # Square R0-R1-R2-R3-R0 with an expensive R0-R3 edge
+    network, routers, hosts = build_network(4, [(0, 1, 1), (1, 2, 1), (2, 3, 1), (3, 0, 5)])
+    assert network.path(routers[0], routers[3])[1] is routers[1]
+
+    network.remove_link(routers[1], routers[2])
+    event = network.convergence_log[-1]
+    assert event["reason"] == "link R1-R2 down" and event["routes_changed"] > 0
+    assert network.path(routers[0], routers[3]) == [routers[0], routers[3]]
+    send(routers[1], hosts[2], "detour")
+    assert [p.payload for p in hosts[2].buffer] == ["detour"]
+
+    network.remove_link(routers[0], routers[3])
+    assert network.path(routers[0], routers[3]) is None
+    assert hosts[3].ip_address not in routers[0].route_table, "Stale route to a partitioned router"
+    send(routers[0], hosts[3], "lost")
+    assert hosts[3].buffer == []
+    print("✓ Link Failure Reroute Test Passed")
+
+
+def test_incremental_matches_full_recompute():
+    rng = random.Random(36)
+    n = 300
+    edges = random_topology(n, 300, rng)
+    network, routers, hosts = build_network(n, edges)
+    full_calls = count_calls(network.compute)
+    logged = len(network.convergence_log)
+
+    calls = []
+    for step in range(40):
+        a, b = rng.sample(routers, 2)
+        if step % 2 and len(network.links[a]) > 1:
+            calls.append(count_calls(network.remove_link, a, rng.choice(list(network.links[a]))))
+        else:
+            calls.append(count_calls(network.add_link, a, b, rng.randint(1, 10)))
+
+    for router in rng.sample(routers, 50):
+        distances, _, first_hops = network._shortest_paths(router)
+        assert network.distances[router] == distances
+        assert network.next_hops[router].keys() == first_hops.keys()
+        for destination, next_hop in network.next_hops[router].items():
+            assert router.route_table[hosts[routers.index(destination)].ip_address] == (next_hop, None)
+
+    events = network.convergence_log[logged:]
+    assert all(e["sources_recomputed"] < n for e in events)
+    mean = sum(calls) / len(calls)
+    assert mean * 5 < full_calls, f"Incremental updates made {mean:.0f} calls vs {full_calls} for a full recompute"
+    print("✓ Incremental Convergence Test Passed")
+
+
+def test_routes_deliver_across_large_topology():
+    rng = random.Random(7)
+    network, routers, hosts = build_network(200, random_topology(200, 100, rng))
+    for _ in range(500):
+        src, dst = rng.randrange(200), rng.randrange(200)
+        hops = len(network.path(routers[src], routers[dst]))
+        calls = count_calls(send, routers[src], hosts[dst], (src, dst))
+        # One table lookup per router on the path, whatever the size of the tables
+        assert calls <= 12 * hops, f"{calls} calls to cross {hops} routers"
+    assert sum(len(h.buffer) for h in hosts) == 500
+    assert all(p.payload[1] == i for i, h in enumerate(hosts) for p in h.buffer)
+    print("✓ Large Topology Delivery Test Passed")
+
+
+if __name__ == "__main__":
+    test_multi_hop_forwarding_and_ttl()
+    test_link_failure_reroutes_and_partitions()
+    test_incremental_matches_full_recompute()
+    test_routes_deliver_across_large_topology()
@@ -0,0 +1,77 @@
+import io
+
+from Sim_LAN1225 import Host, Switch, FixedSwitchFabric
+from lib_final import Bus
+from scenarios import build, check_invariants, generate_scenario, run_scenario, run_many, shrink
+
+
+def test_per_instance_logs(tmp_path):
+    first = FixedSwitchFabric(log_file=str(tmp_path / "a.txt"))
+    memory = io.StringIO()
+    second = FixedSwitchFabric(log_file=memory)
+    silent = FixedSwitchFabric(log_file=None)
+    for fabric in (first, second, silent):
+        switch = Switch(fabric)
+        fabric.connect_host_to_switch(Host("00:00:00:00:00:01", 0, vlan_id=10), switch)
+
+    # Constructing the second fabric must not truncate the first one's log
+    assert "connected to switch interface 0" in (tmp_path / "a.txt").read_text()
+    assert "connected to switch interface 0" in memory.getvalue()
+    bus_log = io.StringIO()
+    Bus(log_file=bus_log)
+    assert "Bus initialized" in bus_log.getvalue()
+    print("✓ Per-Instance Log Test Passed")
+
+
+def test_scenarios_are_reproducible():
+    assert generate_scenario(42) == generate_scenario(42)
+    assert generate_scenario(42) != generate_scenario(43)
+    print("✓ Scenario Reproducibility Test Passed")
+
+
+def test_random_scenarios_hold_invariants():
+    specs = [generate_scenario(1000 + i) for i in range(200)]
+    assert any(spec["lags"] for spec in specs) and any(spec["links"] for spec in specs)
+    assert any(spec["compiled"] for spec in specs)
+    assert run_many(200, seed=1000, procs=1) == []
+    assert run_many(200, seed=2000, procs=2) == []
+    print("✓ Random Scenario Invariant Test Passed")
+
+
+def test_lost_frames_are_violations():
+    spec = {"seed": 0, "hosts": [("00:00:00:00:00:01", 0, 10, "10.10.0.1"), ("00:00:00:00:00:02", 1, 10, "10.10.0.2"),
+                                 ("00:00:00:00:00:03", 2, 20, "10.20.0.3")],
+            "traffic": [(0, None, "m0"), (1, 0, "m1"), (0, 2, "m2"), (2, 0, "m3"), (0, 2, "m4")]}
+    assert run_scenario(spec) == []
+    # A switch that forwarded nothing: m2 went to an unlearned MAC, everything else was due
+    _, switch, hosts = build(spec)
+    violations = check_invariants(spec, switch, hosts)
+    assert violations == ["broadcast m0 never reached host 1", "unicast m1 never reached host 0",
+                          "unicast m3 never reached host 0", "unicast m4 never reached host 2"], violations
+    print("✓ Delivery Invariant Test Passed")
+
+
+def test_shrink_finds_minimal_reproducer():
+    spec = generate_scenario(7, max_hosts=8, max_packets=40)
+    while not any(dst is None for _, dst, _ in spec["traffic"]):
+        spec = generate_scenario(spec["seed"] + 1)
+
+    # Pretend every broadcast violates an invariant
+    def run(candidate):
+        return ["broadcast"] if any(dst is None for _, dst, _ in candidate["traffic"]) else []
+
+    minimal = shrink(spec, run)
+    assert len(minimal["traffic"]) == 1 and minimal["traffic"][0][1] is None
+    assert len(minimal["hosts"]) == 2
+    assert run_scenario(minimal) == [], "Shrunk scenario should still be runnable"
+    print("✓ Scenario Shrinking Test Passed")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_per_instance_logs(pathlib.Path(tempfile.mkdtemp()))
+    test_scenarios_are_reproducible()
+    test_random_scenarios_hold_invariants()
+    test_lost_frames_are_violations()
+    test_shrink_finds_minimal_reproducer()
@@ -0,0 +1,50 @@
+import json
+import sys
+
+from simlan import default_topology, main, simulate
+
+
+def test_packet_and_duration_limits():
+    topology = default_topology(8, 1)
+    topology["link"] = {"bandwidth": 1e8, "delay": 1e-6}
+    traffic = {"rate_pps": 50000, "size": 1000}
+
+    result = simulate(topology, traffic, packets=500)
+    assert result["sent"] == 500 and result["delivered"] == 500
+    # 1000-byte frames on 100 Mbit/s links take 80 us to serialize
+    assert min(result["latencies"]) >= 81e-6 - 1e-12
+
+    result = simulate(topology, traffic, duration=0.01)
+    assert result["sim_time"] == 0.01
+    assert 300 < result["sent"] < 700
+    print("✓ Simulation Limits Test Passed")
+
+
+def test_cli_with_topology_and_traffic_files(tmp_path, capsys):
+    topology = default_topology(6, 2)
+    (tmp_path / "lab.json").write_text(json.dumps(topology))
+    (tmp_path / "bulk.json").write_text(json.dumps({"rate_pps": 20000, "size": 256, "broadcast_fraction": 0.1}))
+    log = tmp_path / "lab_log.txt"
+
+    assert main(["--topology", str(tmp_path / "lab.json"), "--traffic", str(tmp_path / "bulk.json"),
+                 "--packets", "300", "--bandwidth", "1e9", "--log", str(log)]) == 0
+    out = capsys.readouterr().out
+    assert "packets sent:    300" in out and "latency:" in out
+    assert "Switch Fabric initialized" in log.read_text()
+
+    assert main(["--packets", "200", "--replicas", "2", "--procs", "2", "--no-log"]) == 0
+    assert "packets sent:    400" in capsys.readouterr().out
+
+    stdout = sys.stdout
+    assert main(["--packets", "3000", "--replicas", "4", "--threads", "4", "--no-log"]) == 0
+    assert sys.stdout is stdout, "Thread pool left stdout redirected"
+    out = capsys.readouterr().out
+    assert "packets sent:    12000" in out and "packet = " not in out
+
+    assert main(["--packets", "200", "--profile", "cprofile", "--no-log"]) == 0
+    assert "cumulative" in capsys.readouterr().out
+    print("✓ Command-Line Runner Test Passed")
+
+
+if __name__ == "__main__":
+    test_packet_and_duration_limits()
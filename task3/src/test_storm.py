@@ -0,0 +1,83 @@
+from multicast import group_mac_for_ip
+from storm import TokenBucket, StormControl
+from perf_harness import count_calls
+from lan_fixtures import build_lan
+
+BROADCAST = "FF:FF:FF:FF:FF:FF"
+
+
+def test_token_bucket_refills_lazily():
+    bucket = TokenBucket(rate=100, burst=10)
+    assert sum(bucket.take(0.0) for _ in range(20)) == 10
+    assert not bucket.take(0.0)
+    # 50 ms at 100 packets/s earns five tokens, never more than the burst
+    assert sum(bucket.take(0.05) for _ in range(20)) == 5
+    assert sum(bucket.take(100.0) for _ in range(20)) == 10
+    print("✓ Token Bucket Test Passed")
+
+
+def test_broadcast_storm_limited_and_port_shut_down():
+    fabric, switch, hosts = build_lan(6)
+    storm = StormControl(broadcast=TokenBucket(100, burst=20), storm_drops=50, window=1.0, shutdown_time=5.0)
+    switch.set_storm_control(0, storm)
+
+    for k in range(1000):
+        hosts[0].send_packet(BROADCAST, k, switch, "255.255.255.255")
+    assert all(len(h.buffer) == 20 for h in hosts[1:]), "Storm was not rate limited"
+    assert storm.drops["broadcast"] == 50 and storm.shutdowns == 1
+    assert storm.shutdown_drops == 1000 - 20 - 50
+
+    # Other ports are unaffected while port 0 is down
+    hosts[1].send_packet(BROADCAST, "other", switch, "255.255.255.255")
+    assert hosts[2].buffer[-1].payload == "other"
+    hosts[0].send_packet(hosts[2].mac, "unicast", switch, hosts[2].ip_address)
+    assert hosts[2].buffer[-1].payload == "other", "Shut-down port still forwarded"
+
+    fabric.clock.run(until=5.0)
+    hosts[0].send_packet(BROADCAST, "recovered", switch, "255.255.255.255")
+    assert hosts[1].buffer[-1].payload == "recovered"
+    assert storm.stats()["down_until"] is None
+    print("✓ Broadcast Storm Control Test Passed")
+
+
+def test_limits_per_traffic_kind():
+    fabric, switch, hosts = build_lan(6)
+    storm = StormControl(unknown_unicast=5, multicast=TokenBucket(10, burst=3))
+    switch.set_storm_control(0, storm)
+    group = group_mac_for_ip("239.1.1.1")
+    hosts[1].join_group(group, switch)
+
+    for k in range(10):
+        hosts[0].send_packet("00:00:00:00:AA:AA", k, switch, "192.168.10.99")
+        hosts[0].send_packet(group, k, switch, "239.1.1.1")
+        hosts[0].send_packet(hosts[2].mac, k, switch, hosts[2].ip_address)
+    assert storm.drops == {"broadcast": 0, "unknown_unicast": 5, "multicast": 7}
+    assert [p.payload for p in hosts[1].buffer] == [0, 1, 2]
+    assert len(hosts[2].buffer) == 10, "Known unicast must not be rate limited"
+    assert storm.shutdowns == 0
+    print("✓ Per-kind Rate Limit Test Passed")
+
+
+def test_storm_control_bounds_flood_cost():
+    def storm_cost(control):
+        _, switch, hosts = build_lan(48)
+        if control is not None:
+            switch.set_storm_control(0, control)
+
+        def flood():
+            for k in range(3000):
+                hosts[0].send_packet(BROADCAST, k, switch, "255.255.255.255")
+        return count_calls(flood), sum(len(h.buffer) for h in hosts)
+
+    unlimited, flooded = storm_cost(None)
+    limited, delivered = storm_cost(StormControl(broadcast=100, storm_drops=100))
+    assert flooded == 3000 * 47 and delivered == 100 * 47
+    assert limited * 10 < unlimited, f"Storm control made {limited} calls vs {unlimited} unlimited"
+    print("✓ Storm Flood Cost Test Passed")
+
+
+if __name__ == "__main__":
+    test_token_bucket_refills_lazily()
+    test_broadcast_storm_limited_and_port_shut_down()
+    test_limits_per_traffic_kind()
+    test_storm_control_bounds_flood_cost()